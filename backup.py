@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+
+from constants import DELTA_BACKUP_EXT
+from pck import COPY_CHUNK_SIZE, PCKError, has_patch_marker
+
+BACKUP_MAGIC = b"UTPCKBAK"
+BACKUP_FORMAT_VERSION = 2
+TAIL_CHECK_SIZE = 64 * 1024
+_U32 = struct.Struct("<I")
+
+
+class BackupError(Exception):
+    pass
+
+
+class DeltaBackup:
+    # Guarda só os trechos do PCK original que o gravador nativo sobrescreve (cabeçalho e diretório);
+    # todo o resto é anexado após o fim original, então restaurar é regravar os trechos e truncar.
+    def __init__(self, original_size, tail_sha256, regions=None, original_sha256=None):
+        self.original_size = original_size
+        self.tail_sha256 = tail_sha256
+        self.regions = regions or []
+        self.original_sha256 = original_sha256
+
+    @classmethod
+    def create(cls, f, original_size=None, full_hash=False):
+        # original_size: numa execução retomada, o que a anterior anexou não faz parte do original.
+        # full_hash lê o arquivo inteiro uma vez para que a restauração possa ser conferida por completo.
+        if original_size is None:
+            original_size = f.seek(0, os.SEEK_END)
+        tail_start = max(0, original_size - TAIL_CHECK_SIZE)
+        f.seek(tail_start)
+        tail_sha256 = hashlib.sha256(f.read(original_size - tail_start)).hexdigest()
+        original_sha256 = _sha256_range(f, original_size) if full_hash else None
+        return cls(original_size, tail_sha256, original_sha256=original_sha256)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.read(len(BACKUP_MAGIC)) != BACKUP_MAGIC:
+                raise PCKError(f"\"{Path(path).name}\" não é uma cópia de segurança válida.")
+            meta_len, = _U32.unpack(f.read(4))
+            meta = json.loads(f.read(meta_len).decode("utf-8"))
+            if meta.get("version") not in (1, BACKUP_FORMAT_VERSION):
+                raise PCKError(f"Versão de cópia de segurança não suportada: {meta.get('version')}.")
+            regions = [(offset, f.read(length)) for offset, length in meta["regions"]]
+        backup = cls(meta["original_size"], meta["tail_sha256"], regions, meta.get("original_sha256"))
+        if backup.digest() != meta["sha256"]:
+            raise PCKError(f"A cópia de segurança \"{Path(path).name}\" está corrompida.")
+        return backup
+
+    def save(self, path):
+        meta = json.dumps({
+            "version": BACKUP_FORMAT_VERSION,
+            "original_size": self.original_size,
+            "tail_sha256": self.tail_sha256,
+            "original_sha256": self.original_sha256,
+            "regions": [[offset, len(data)] for offset, data in self.regions],
+            "sha256": self.digest(),
+        }).encode("utf-8")
+        tmp_path = Path(str(path) + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(BACKUP_MAGIC + _U32.pack(len(meta)) + meta)
+            for _, data in self.regions:
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def digest(self):
+        digest = hashlib.sha256(str(self.original_size).encode("ascii"))
+        for offset, data in sorted(self.regions):
+            digest.update(offset.to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    @property
+    def size(self):
+        return sum(len(data) for _, data in self.regions)
+
+    def _uncovered(self, start, end):
+        pos = start
+        for offset, data in sorted(self.regions):
+            if offset + len(data) <= pos:
+                continue
+            if offset >= end:
+                break
+            if offset > pos:
+                yield pos, offset
+            pos = max(pos, offset + len(data))
+        if pos < end:
+            yield pos, end
+
+    def capture(self, f, ranges):
+        # Só os bytes dentro do tamanho original importam; o que foi anexado depois é descartado.
+        for start, end in ranges:
+            for gap_start, gap_end in list(self._uncovered(start, min(end, self.original_size))):
+                f.seek(gap_start)
+                self.regions.append((gap_start, f.read(gap_end - gap_start)))
+
+    def _original_bytes(self, f, start, end):
+        f.seek(start)
+        data = bytearray(f.read(end - start))
+        for offset, region in self.regions:
+            lo, hi = max(offset, start), min(offset + len(region), end)
+            if lo < hi:
+                data[lo - start:hi - start] = region[lo - offset:hi - offset]
+        return bytes(data)
+
+    def matches(self, f):
+        file_size = f.seek(0, os.SEEK_END)
+        if file_size < self.original_size:
+            return False
+        tail_start = max(0, self.original_size - TAIL_CHECK_SIZE)
+        tail = self._original_bytes(f, tail_start, self.original_size)
+        return hashlib.sha256(tail).hexdigest() == self.tail_sha256
+
+    def restore(self, f):
+        if not self.matches(f):
+            raise PCKError("O arquivo do jogo não corresponde à cópia de segurança (o jogo foi atualizado?).")
+        for offset, data in self.regions:
+            f.seek(offset)
+            f.write(data)
+        f.truncate(self.original_size)
+        f.flush()
+        os.fsync(f.fileno())
+
+        if self.original_sha256 is not None:
+            if _sha256_range(f, self.original_size) != self.original_sha256:
+                raise PCKError("A restauração não reproduziu o arquivo original.")
+            return
+        # Cópias da versão 1 não têm o hash do arquivo inteiro; confere só os trechos regravados.
+        restored_regions = []
+        for offset, data in self.regions:
+            f.seek(offset)
+            restored_regions.append((offset, f.read(len(data))))
+        restored = DeltaBackup(self.original_size, self.tail_sha256, restored_regions)
+        if f.seek(0, os.SEEK_END) != self.original_size or restored.digest() != self.digest():
+            raise PCKError("A restauração não reproduziu o arquivo original.")
+
+
+def _sha256_range(f, size):
+    digest = hashlib.sha256()
+    f.seek(0)
+    remaining = size
+    while remaining:
+        chunk = f.read(min(remaining, COPY_CHUNK_SIZE))
+        if not chunk:
+            raise PCKError("Arquivo PCK truncado ou corrompido.")
+        digest.update(chunk)
+        remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def delta_backup_path(pck_path):
+    pck_path = Path(pck_path)
+    return pck_path.with_name(f"{pck_path.stem}OLD{DELTA_BACKUP_EXT}")
+
+
+def update_delta_backup(backup_path, f, ranges, original_size=None):
+    backup = None
+    if Path(backup_path).exists():
+        backup = DeltaBackup.load(backup_path)
+        # Uma cópia de outra versão do jogo (ex.: atualizado pela Steam) não serve mais.
+        if not backup.matches(f):
+            backup = None
+    if backup is None:
+        # Sem cópia válida, o arquivo precisa ser o original: um PCK já traduzido viraria a "cópia do original".
+        if has_patch_marker(f):
+            raise BackupError(f"\"{Path(backup_path).name}\" não existe e o arquivo do jogo já foi modificado por "
+                           f"uma instalação anterior, então não é possível guardar uma cópia do original. "
+                           f"Verifique a integridade dos arquivos do jogo na Steam e tente novamente.")
+        backup = DeltaBackup.create(f, original_size, full_hash=True)
+    backup.capture(f, ranges)
+    backup.save(backup_path)
+    return backup
+
+
+def restore_delta_backup(pck_path, backup_path):
+    backup = DeltaBackup.load(backup_path)
+    with open(pck_path, "r+b") as f:
+        backup.restore(f)
+    Path(backup_path).unlink()
+    return backup
@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import stat
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import patching
+from bundle import TranslationBundle
+from constants import GODOT_VERSION_STR, PCK_FILENAME, STEAM_APP_IDS
+from fingerprint import FULL_GAME_MARKER
+from instrumentation import Instrumentation, peak_rss
+from pck import (DIRECTORY_OFFSET, PCK_FORMAT_VERSION, RES_PREFIX, PCKEntry, PCKHeader, align, collect_assets,
+                 directory_size, serialize_directory, serialize_header)
+from steam import find_game_installs
+from validation import validate_game_folder
+
+# Mede cada fase da instalação sobre um PCK sintético: detecção na Steam, validação da pasta, cálculo
+# do delta, cópia de segurança, gravação, verificação e (no caminho do explorer) finalização.
+# Cada cenário roda num processo novo para que o pico de memória seja só dele. As fases são os spans
+# do instalador (instrumentation.py); os bytes lidos e gravados são os das chamadas read()/write() do
+# processo: leituras por mmap e o I/O do explorer (processo filho) não entram nesses números.
+
+VARIANTS = {"demo": "Demo", "full": "Completa"}
+DEFAULT_SIZES = {"demo": (1000, 32 * 1024), "full": (4000, 32 * 1024)}
+PAYLOAD_POOL_SIZE = 1024 * 1024
+METHODS = ("native", "explorer")
+# "replace": o PCK já tem todos os caminhos da tradução. "add": uma parte deles falta no PCK, então a
+# instalação acrescenta entradas, o diretório cresce e os dados logo depois dele são realocados.
+LAYOUTS = ("replace", "add")
+ADDED_EVERY = 10
+
+
+def phase_totals(spans):
+    # Tempo e I/O exclusivos de cada fase: o que um span aninhado gasta não conta para o de fora.
+    phases = {}
+
+    def add(span):
+        children = [child for child in span.children if child.seconds is not None]
+        stats = phases.setdefault(span.name, {"seconds": 0.0, "read_bytes": 0, "written_bytes": 0, "calls": 0})
+        stats["seconds"] += span.seconds - sum(child.seconds for child in children)
+        for field, attr in (("read_bytes", "io_read"), ("written_bytes", "io_written")):
+            stats[field] += span.attrs.get(attr, 0) - sum(child.attrs.get(attr, 0) for child in children)
+        stats["calls"] += 1
+        for child in children:
+            add(child)
+
+    for span in spans:
+        if span.seconds is not None:
+            add(span)
+    return {name: dict(stats, seconds=round(stats["seconds"], 4)) for name, stats in phases.items()}
+
+
+def _translation_keys(translations_path, variant):
+    assets_dir = patching.translation_assets(translations_path, VARIANTS[variant])
+    if isinstance(assets_dir, str):
+        return [(asset.key, asset.size) for asset in collect_assets(assets_dir)]
+    with TranslationBundle(assets_dir.bundle_path) as bundle:
+        return [(asset.key, asset.size) for asset in bundle.assets(assets_dir.variant)]
+
+
+def make_synthetic_pck(pck_path, entry_count, entry_size, translated=(), full=True, seed=0, filler_first=False):
+    # PCK no formato de GODOT_VERSION_STR com os caminhos da tradução (com outro conteúdo, como o
+    # texto original) e arquivos de enchimento até entry_count. Com filler_first, os dados logo após o
+    # diretório não são da tradução e precisam ser realocados se ele crescer. Devolve o tamanho final.
+    rows = list(translated)
+    if full and not any(key.startswith(FULL_GAME_MARKER) for key, _ in rows):
+        rows.append((FULL_GAME_MARKER + "synthetic.inkb", entry_size))
+    filler = [(f"assets/synthetic/{i:06d}.bin", entry_size) for i in range(max(0, entry_count - len(rows)))]
+    rows = filler + rows if filler_first else rows + filler
+
+    paths = [RES_PREFIX + key for key, _ in rows]
+    file_base = align(DIRECTORY_OFFSET + directory_size(paths))
+    _, ver_major, ver_minor, ver_patch = (int(part) for part in GODOT_VERSION_STR.split("."))
+    header = PCKHeader(PCK_FORMAT_VERSION, ver_major, ver_minor, ver_patch, 0, file_base)
+
+    pool = random.Random(seed).randbytes(PAYLOAD_POOL_SIZE)
+    pool += pool
+    entries = []
+    with open(pck_path, "wb") as f:
+        f.write(serialize_header(header))
+        f.seek(file_base)
+        for i, (path, (_, size)) in enumerate(zip(paths, rows)):
+            md5 = hashlib.md5()
+            offset = f.tell() - file_base
+            remaining = size
+            start = (i * 7919) % PAYLOAD_POOL_SIZE
+            while remaining:
+                chunk = pool[start:start + min(remaining, PAYLOAD_POOL_SIZE)]
+                md5.update(chunk)
+                f.write(chunk)
+                remaining -= len(chunk)
+            f.write(b"\0" * (-size % 16))
+            entries.append(PCKEntry(path, offset, size, md5.digest()))
+        end = f.tell()
+        f.seek(DIRECTORY_OFFSET)
+        f.write(serialize_directory(entries))
+    return end
+
+
+def make_steam_library(root, install_dir, app_id=None):
+    # Biblioteca mínima da Steam para a detecção: libraryfolders.vdf e, com app_id, o manifesto.
+    steamapps = Path(root) / "steamapps"
+    game_folder = steamapps / "common" / install_dir
+    game_folder.mkdir(parents=True, exist_ok=True)
+    apps = f'\t\t"apps"\n\t\t{{\n\t\t\t"{app_id}"\t\t"0"\n\t\t}}\n' if app_id else ""
+    path = str(Path(root)).replace("\\", "\\\\")
+    (steamapps / "libraryfolders.vdf").write_text(
+        f'"libraryfolders"\n{{\n\t"0"\n\t{{\n\t\t"path"\t\t"{path}"\n{apps}\t}}\n}}\n', encoding="utf-8")
+    if app_id:
+        (steamapps / f"appmanifest_{app_id}.acf").write_text(
+            f'"AppState"\n{{\n\t"appid"\t\t"{app_id}"\n\t"name"\t\t"{install_dir}"\n'
+            f'\t"installdir"\t\t"{install_dir}"\n}}\n', encoding="utf-8")
+    return game_folder
+
+
+def make_explorer_launcher(folder):
+    # O instalador executa o explorer diretamente; o substituto em Python precisa de um lançador.
+    stub = Path(__file__).resolve().parent / "pck_explorer_stub.py"
+    if os.name == "nt":
+        launcher = Path(folder) / "GodotPCKExplorer.Console.cmd"
+        launcher.write_text(f'@"{sys.executable}" "{stub}" %*\n', encoding="utf-8")
+    else:
+        launcher = Path(folder) / "GodotPCKExplorer.Console.sh"
+        launcher.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{stub}" "$@"\n', encoding="utf-8")
+        launcher.chmod(launcher.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return str(launcher)
+
+
+def run_scenario(variant, method, layout, entry_count, entry_size, translations_path, keep_backup, seed):
+    with tempfile.TemporaryDirectory(prefix="ut-bench-") as workdir:
+        workdir = Path(workdir)
+        # Cache de builds vazio: a validação é medida a frio, como na primeira abertura.
+        os.environ["XDG_CACHE_HOME"] = os.environ["LOCALAPPDATA"] = str(workdir / "cache")
+        full = variant == "full"
+        game_folder = make_steam_library(workdir / "steam", "Until Then" if full else "Until Then Demo",
+                                         STEAM_APP_IDS[0] if full else None)
+        pck_path = game_folder / PCK_FILENAME
+        translated = [(key, size + 1) for key, size in _translation_keys(translations_path, variant)]
+        added = translated[::ADDED_EVERY] if layout == "add" else []
+        base = [row for row in translated if row not in added]
+        pck_size = make_synthetic_pck(pck_path, entry_count, entry_size, base, full, seed, filler_first=bool(added))
+
+        instrumentation = Instrumentation()
+        start = time.perf_counter()
+        with instrumentation.span("detection"):
+            installs = find_game_installs(registry=lambda: str(workdir / "steam"), extra_roots=())
+        with instrumentation.span("validation"):
+            result = validate_game_folder(installs[0].path if installs else str(game_folder))
+        if not result.ok:
+            raise RuntimeError(f"Validação do PCK sintético falhou: {result.error}")
+
+        pck_explorer_path = make_explorer_launcher(workdir) if method == "explorer" else None
+        # O PCK sintético é pequeno demais para a regra de tamanho da detecção; a tradução segue o cenário.
+        patcher = patching.TranslationPatcher(
+            result.pck_path, patching.translation_assets(translations_path, VARIANTS[variant]),
+            keep_backup=keep_backup, pck_explorer_path=pck_explorer_path, instrumentation=instrumentation)
+        if method == "explorer":
+            # O run() só recorre ao explorer quando o caminho nativo falha; aqui ele é chamado direto.
+            patcher._run_explorer()
+            patcher.verify()
+        else:
+            patcher.run()
+        wall = time.perf_counter() - start
+
+        return {
+            "variant": variant,
+            "method": method,
+            "layout": layout,
+            "detected_variant": result.variant,
+            "entries": entry_count,
+            "entry_size": entry_size,
+            "pck_bytes": pck_size,
+            "translated_files": len(translated),
+            "added_files": len(added),
+            "wall_seconds": round(wall, 4),
+            "peak_rss_bytes": peak_rss(),
+            "peak_rss_children_bytes": peak_rss(children=True),
+            "phases": phase_totals(instrumentation.spans),
+            # No caminho nativo, quantas entradas foram acrescentadas e realocadas pelo crescimento do diretório.
+            "packing": next((span.attrs for span in instrumentation.spans if span.name == "packing"), {}),
+            "patch": patcher.stats,
+        }
+
+
+def compare(baseline, results, threshold):
+    # Fases que ficaram mais de threshold (fração) mais lentas que no baseline.
+    regressions = []
+    old = {(s["variant"], s["method"], s.get("layout", "replace")): s for s in baseline.get("scenarios", [])}
+    for scenario in results["scenarios"]:
+        previous = old.get((scenario["variant"], scenario["method"], scenario["layout"]))
+        if not previous:
+            continue
+        for name, stats in scenario["phases"].items():
+            before = previous["phases"].get(name, {}).get("seconds")
+            if before and stats["seconds"] > before * (1 + threshold) and stats["seconds"] - before > 0.01:
+                regressions.append(f"{scenario['variant']}/{scenario['method']}/{scenario['layout']} {name}: "
+                                   f"{before:.3f} s -> {stats['seconds']:.3f} s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta da instalação com PCKs sintéticos.")
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=sorted(VARIANTS))
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS),
+                        help=f"\"add\" tira do PCK 1 em cada {ADDED_EVERY} arquivos da tradução")
+    parser.add_argument("--entries", type=int, default=None, help="entradas no PCK (padrão: por variante)")
+    parser.add_argument("--entry-size", type=int, default=None, help="bytes por entrada de enchimento")
+    parser.add_argument("--translations", type=Path, default=patching.find_translations(REPO_ROOT))
+    parser.add_argument("--keep-backup", action="store_true", help="inclui a cópia de segurança nas medições")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("install_pipeline.json"))
+    parser.add_argument("--baseline", type=Path, help="resultado anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.2, help="piora tolerada em relação ao baseline")
+    args = parser.parse_args(argv)
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "translations": str(args.translations),
+        "scenarios": [],
+    }
+    context = multiprocessing.get_context("spawn")
+    for variant in args.variants:
+        entries, entry_size = DEFAULT_SIZES[variant]
+        for method in args.methods:
+            for layout in args.layouts:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    scenario = executor.submit(run_scenario, variant, method, layout, args.entries or entries,
+                                               args.entry_size or entry_size, str(args.translations),
+                                               args.keep_backup, args.seed).result()
+                results["scenarios"].append(scenario)
+                phases = ", ".join(f"{name} {stats['seconds']:.3f}s" for name, stats in scenario["phases"].items())
+                print(f"{variant}/{method}/{layout}: {scenario['wall_seconds']:.3f}s ({phases})", file=sys.stderr)
+
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Resultados gravados em \"{args.output}\".", file=sys.stderr)
+
+    if args.baseline:
+        regressions = compare(json.loads(args.baseline.read_text(encoding="utf-8")), results, args.threshold)
+        for line in regressions:
+            print(f"REGRESSÃO: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from constants import BASE_TRANSLATION_PATH
+from optimize import _minify_file, minify_json_files, translation_json_files
+
+
+def _load_time(datas, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in datas:
+            json.loads(data.decode("utf-8-sig"))
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(source, repeat, workers):
+    paths = [str(p) for p in translation_json_files(source)]
+    originals = [Path(p).read_bytes() for p in paths]
+
+    results, pool_time = _timed(lambda: minify_json_files(paths, workers))
+    _, serial_time = _timed(lambda: [_minify_file(p) for p in paths])
+    minified = [results[p].data for p in paths]
+
+    return {
+        "files": len(paths),
+        "workers": workers or os.cpu_count(),
+        "pck_bytes": {"original": sum(map(len, originals)), "minified": sum(map(len, minified))},
+        "deflate_bytes": {"original": sum(len(zlib.compress(d, 9)) for d in originals),
+                          "minified": sum(len(zlib.compress(d, 9)) for d in minified)},
+        "load_seconds": {"original": round(_load_time(originals, repeat), 4),
+                         "minified": round(_load_time(minified, repeat), 4)},
+        "stage_seconds": {"serial": round(serial_time, 4), "process_pool": round(pool_time, 4)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara os JSON da tradução antes e depois da compactação.")
+    parser.add_argument("--source", type=Path,
+                        default=Path(__file__).resolve().parent.parent / BASE_TRANSLATION_PATH)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.source, args.repeat, args.workers), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from constants import GODOT_PCK_EXPLORER, PATH_PREFIX_STRING
+from pck import COPY_CHUNK_SIZE, collect_assets, patch_pck
+
+# Substituto local do GodotPCKExplorer.Console.exe para os benchmarks. Aceita só o comando usado pelo
+# instalador (-pc origem pasta destino versão prefixo) e, como o original, grava um PCK novo inteiro
+# antes de incluir os arquivos; o progresso sai no mesmo formato "NN%" que o instalador lê.
+
+
+def _copy_with_progress(src_path, dst_path):
+    total = Path(src_path).stat().st_size or 1
+    done = 0
+    last = -1
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        while chunk := src.read(COPY_CHUNK_SIZE):
+            dst.write(chunk)
+            done += len(chunk)
+            percent = done * 90 // total
+            if percent != last:
+                print(f"Copiando arquivos: {percent}%", flush=True)
+                last = percent
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) < 4 or args[0] != "-pc":
+        print(f"Uso: {GODOT_PCK_EXPLORER} -pc <pck> <pasta> <saída> [versão] [prefixo]", file=sys.stderr)
+        return 2
+    src_pck, assets_dir, out_pck = args[1:4]
+    prefix = args[5] if len(args) > 5 else PATH_PREFIX_STRING
+
+    _copy_with_progress(src_pck, out_pck)
+    assets = collect_assets(assets_dir, prefix)
+    patch_pck(out_pck, assets)
+    print(f"{len(assets)} arquivos incluídos: 100%", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
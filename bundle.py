@@ -0,0 +1,180 @@
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from constants import (BASE_TRANSLATION_PATH, DEMO_TRANSLATION_SUBDIR, FULL_TRANSLATION_SUBDIR, MAIN_SUBDIR_NAME,
+                       PATH_PREFIX_STRING, TRANSLATION_BUNDLE_FILENAME)
+from pck import COPY_CHUNK_SIZE, AssetFile, collect_assets
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+BLOB_DIR = "blobs/"
+VARIANT_SUBDIRS = {"Demo": DEMO_TRANSLATION_SUBDIR, "Completa": FULL_TRANSLATION_SUBDIR}
+# Data fixa nas entradas do zip: o mesmo conteúdo sempre gera o mesmo arquivo.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class BundleError(Exception):
+    pass
+
+
+class BundleAsset(AssetFile):
+    __slots__ = ("bundle",)
+
+    def __init__(self, path, blob, size, md5, bundle):
+        super().__init__(path, blob, size, md5)
+        self.bundle = bundle
+
+    def open(self):
+        return self.bundle.open_blob(self.source)
+
+
+class TranslationBundle:
+    # Arquivo zip com um blob por conteúdo (sha256) e um manifesto (variante, caminho no PCK) -> blob.
+    def __init__(self, path):
+        # zipfile e shutil só são usados com o pacote; importá-los aqui mantém "import patching" leve.
+        import zipfile
+        self.path = Path(path)
+        try:
+            self._zip = zipfile.ZipFile(self.path)
+        except (OSError, zipfile.BadZipFile) as e:
+            raise BundleError(f"Não foi possível abrir \"{self.path.name}\": {e}")
+        try:
+            manifest = json.loads(self._zip.read(MANIFEST_NAME).decode("utf-8"))
+        except (KeyError, ValueError) as e:
+            self._zip.close()
+            raise BundleError(f"\"{self.path.name}\" não é um pacote de tradução válido: {e}")
+        if manifest.get("version") != BUNDLE_FORMAT_VERSION:
+            self._zip.close()
+            raise BundleError(f"Versão de pacote de tradução não suportada: {manifest.get('version')}.")
+        self.blobs = manifest["blobs"]
+        self.variants = manifest["variants"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    def open_blob(self, blob):
+        return self._zip.open(BLOB_DIR + blob)
+
+    def assets(self, variant):
+        if variant not in self.variants:
+            raise BundleError(f"O pacote de tradução não contém a versão \"{variant}\" do jogo.")
+        assets = []
+        for path, blob in sorted(self.variants[variant].items()):
+            info = self.blobs[blob]
+            assets.append(BundleAsset(path, blob, info["size"], bytes.fromhex(info["md5"]), self))
+        return assets
+
+    def extract(self, variant, dest, prefix=PATH_PREFIX_STRING):
+        # Para o GodotPCKExplorer, que só aceita uma pasta.
+        import shutil
+        dest = Path(dest)
+        for asset in self.assets(variant):
+            rel_path = asset.path[len(prefix):] if asset.path.startswith(prefix) else asset.path
+            target = dest / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with asset.open() as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+
+
+class BundleVariant:
+    # Origem dos arquivos de uma variante dentro do pacote; usada no lugar da pasta de assets.
+    __slots__ = ("bundle_path", "variant")
+
+    def __init__(self, bundle_path, variant):
+        self.bundle_path = Path(bundle_path)
+        self.variant = variant
+
+    def __str__(self):
+        return f"{self.bundle_path}:{self.variant}"
+
+
+def build_bundle(source_dir, output_path, compresslevel=9, minified=None):
+    # minified: caminho de origem -> MinifyResult (ver optimize.py); o conteúdo compactado substitui o arquivo.
+    import zipfile
+    source_dir = Path(source_dir)
+    minified = minified or {}
+    blobs = {}
+    blob_data = {}
+    variants = {}
+    total_files = 0
+    total_bytes = 0
+    for variant, sub_dir in VARIANT_SUBDIRS.items():
+        assets_dir = source_dir / sub_dir / MAIN_SUBDIR_NAME
+        if not assets_dir.is_dir():
+            continue
+        files = {}
+        for asset in collect_assets(assets_dir):
+            result = minified.get(str(asset.source))
+            data = result.data if result else Path(asset.source).read_bytes()
+            blob = hashlib.sha256(data).hexdigest()
+            files[asset.path] = blob
+            if blob not in blobs:
+                blobs[blob] = {"size": len(data), "md5": hashlib.md5(data).hexdigest()}
+                blob_data[blob] = data
+            total_files += 1
+            total_bytes += asset.size
+        variants[variant] = files
+    if not variants:
+        raise BundleError(f"Nenhuma pasta de tradução encontrada em \"{source_dir}\".")
+
+    manifest = {"version": BUNDLE_FORMAT_VERSION, "blobs": blobs, "variants": variants}
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zf:
+        zf.writestr(zipfile.ZipInfo(MANIFEST_NAME, ZIP_DATE_TIME),
+                    json.dumps(manifest, sort_keys=True, separators=(",", ":")),
+                    zipfile.ZIP_DEFLATED, compresslevel)
+        for blob in sorted(blob_data):
+            zf.writestr(zipfile.ZipInfo(BLOB_DIR + blob, ZIP_DATE_TIME), blob_data[blob],
+                        zipfile.ZIP_DEFLATED, compresslevel)
+    tmp_path.replace(output_path)
+
+    return {
+        "files": total_files,
+        "blobs": len(blobs),
+        "source_bytes": total_bytes,
+        "unique_bytes": sum(info["size"] for info in blobs.values()),
+        "bundle_bytes": output_path.stat().st_size,
+    }
+
+
+def main(argv=None):
+    application_path = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(prog="python -m bundle", description="Pacote com os arquivos da tradução.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="gera o pacote a partir da pasta de tradução")
+    build_parser.add_argument("--source", type=Path, default=application_path / BASE_TRANSLATION_PATH)
+    build_parser.add_argument("--output", type=Path, default=application_path / TRANSLATION_BUNDLE_FILENAME)
+    build_parser.add_argument("--minify-json", action="store_true",
+                              help="valida e compacta os arquivos JSON antes de empacotar")
+    args = parser.parse_args(argv)
+
+    minified = None
+    if args.minify_json:
+        from optimize import OptimizeError, minify_json_files, print_report, translation_json_files
+        try:
+            minified = minify_json_files(translation_json_files(args.source))
+        except OptimizeError as e:
+            print(f"ERRO: {e}", file=sys.stderr)
+            return 1
+        print_report(minified, args.source)
+
+    stats = build_bundle(args.source, args.output, minified=minified)
+    mb = 1024 * 1024
+    print(f"{stats['files']} arquivos, {stats['blobs']} conteúdos distintos: "
+          f"{stats['source_bytes'] / mb:.1f} MB -> {stats['unique_bytes'] / mb:.1f} MB sem duplicatas -> "
+          f"{stats['bundle_bytes'] / mb:.1f} MB compactado em \"{args.output.name}\".")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
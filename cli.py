@@ -0,0 +1,195 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from constants import PCK_KEY_ENV, PCK_KEY_FILENAME
+from instrumentation import Instrumentation
+from patching import (PatchError, TranslationPatcher, ValidationError, check_pck_file, detect_game_variant,
+                      check_translation_assets, find_pck_explorer, find_translations, recover_interrupted_patch,
+                      translation_assets)
+from pck_crypto import CryptoError, set_encryption_key
+from steam import find_game_installs
+from verify import VERIFY_CHUNK_SIZE
+
+APPLICATION_PATH = Path(__file__).resolve().parent
+DEFAULT_WORKERS = 4
+
+
+def _folder_logger(folder, quiet):
+    def log(message, error=False, **kwargs):
+        if quiet and not error:
+            return
+        for line in message.strip().splitlines():
+            if line:
+                print(f"[{folder}] {line}", file=sys.stderr, flush=True)
+    return log
+
+
+def patch_folder(folder, translations_path, keep_backup=False, pck_explorer_path=None, quiet=False, profile=False):
+    log = _folder_logger(folder, quiet)
+    result = {"folder": str(folder), "status": None, "timings": {}}
+    start = time.perf_counter()
+    try:
+        recover_interrupted_patch(folder, log)
+        pck_path = check_pck_file(folder)
+        variant, build = detect_game_variant(pck_path, log)
+        result.update(variant=variant, build_id=build.build_id if build else None)
+        assets = check_translation_assets(translation_assets(translations_path, variant))
+        result["timings"]["validate"] = round(time.perf_counter() - start, 4)
+
+        patch_start = time.perf_counter()
+        instrumentation = Instrumentation(profile)
+        instrumentation.record("validation", result["timings"]["validate"])
+        patcher = TranslationPatcher(pck_path, assets, keep_backup=keep_backup, pck_explorer_path=pck_explorer_path,
+                                     log=log, instrumentation=instrumentation)
+        try:
+            patcher.run()
+        finally:
+            result.update(patcher.stats)
+            result["timings"]["patch"] = round(time.perf_counter() - patch_start, 4)
+            result["report"] = instrumentation.to_dict()
+    except ValidationError as e:
+        result.update(status="invalid", error=str(e))
+    except PatchError as e:
+        result.update(status="error", error=f"{e.title}: {e.details}")
+    except Exception as e:
+        result.update(status="error", error=f"Erro Inesperado: {e}")
+    result["timings"]["total"] = round(time.perf_counter() - start, 4)
+    if result["status"] in ("invalid", "error"):
+        log(result["error"], error=True)
+    return result
+
+
+def verify_folder(folder, translations_path, workers=None, chunk_size=VERIFY_CHUNK_SIZE, quiet=False, profile=False):
+    log = _folder_logger(folder, quiet)
+    result = {"folder": str(folder), "status": None}
+    try:
+        pck_path = check_pck_file(folder)
+        variant, _ = detect_game_variant(pck_path, log)
+        assets = check_translation_assets(translation_assets(translations_path, variant))
+        instrumentation = Instrumentation(profile)
+        patcher = TranslationPatcher(pck_path, assets, log=log, instrumentation=instrumentation)
+        with instrumentation.profiled():
+            report = patcher.verify(workers, chunk_size)
+        result.update(variant=variant, status="ok" if report.ok else "mismatch", **report.to_dict())
+        result["report"] = instrumentation.to_dict()
+    except ValidationError as e:
+        result.update(status="invalid", error=str(e))
+    except PatchError as e:
+        result.update(status="error", error=f"{e.title}: {e.details}")
+    except Exception as e:
+        result.update(status="error", error=f"Erro Inesperado: {e}")
+    if result["status"] in ("invalid", "error"):
+        log(result["error"], error=True)
+    return result
+
+
+def _resolve_folders(args):
+    game_folders = list(args.game_folders)
+    if args.steam:
+        game_folders.extend(install.path for install in find_game_installs())
+    folders = []
+    for folder in game_folders:
+        resolved = Path(folder).resolve()
+        if resolved not in folders:
+            folders.append(resolved)
+    return folders
+
+
+def run_apply(args):
+    folders = _resolve_folders(args)
+    if not folders:
+        print("Nenhuma pasta do jogo informada ou encontrada na Steam.", file=sys.stderr)
+        return 2
+
+    pck_explorer_path = args.pck_tool or find_pck_explorer(APPLICATION_PATH)
+    workers = max(1, min(args.workers, len(folders)))
+    if args.profile:
+        # O cProfile só pode estar ativo numa thread por vez (no Python 3.12+, a segunda falha).
+        workers = 1
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda folder: patch_folder(folder, args.translations, args.keep_backup, pck_explorer_path, args.quiet,
+                                        args.profile),
+            folders))
+
+    summary = {
+        "command": "apply",
+        "workers": workers,
+        "elapsed": round(time.perf_counter() - start, 4),
+        "ok": all(r["status"] in ("patched", "up_to_date") for r in results),
+        "results": results,
+    }
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary["ok"] else 1
+
+
+def run_verify(args):
+    folders = _resolve_folders(args)
+    if not folders:
+        print("Nenhuma pasta do jogo informada ou encontrada na Steam.", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    # As pastas são conferidas uma a uma; o paralelismo fica dentro de cada verificação.
+    results = [verify_folder(folder, args.translations, args.workers, args.chunk_size, args.quiet, args.profile)
+               for folder in folders]
+    summary = {
+        "command": "verify",
+        "elapsed": round(time.perf_counter() - start, 4),
+        "ok": all(r["status"] == "ok" for r in results),
+        "results": results,
+    }
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary["ok"] else 1
+
+
+def _add_common_arguments(parser):
+    parser.add_argument("game_folders", nargs="*", help="pastas de instalação do jogo")
+    parser.add_argument("--steam", action="store_true",
+                        help="inclui todas as instalações do jogo encontradas na Steam")
+    parser.add_argument("--translations", type=Path, default=find_translations(APPLICATION_PATH),
+                        help="pasta ou pacote (.zip) com os arquivos da tradução")
+    parser.add_argument("--quiet", action="store_true", help="mostra apenas erros no stderr")
+    parser.add_argument("--profile", action="store_true",
+                        help="inclui no relatório as funções mais demoradas (cProfile)")
+    parser.add_argument("--key", help=f"chave AES-256 em hexadecimal de PCKs criptografados "
+                                      f"(padrão: variável {PCK_KEY_ENV} ou \"{PCK_KEY_FILENAME}\")")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Instalador da tradução sem interface gráfica.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    apply_parser = subparsers.add_parser("apply", help="aplica a tradução em uma ou mais pastas do jogo")
+    _add_common_arguments(apply_parser)
+    apply_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                              help=f"pastas processadas em paralelo (padrão: {DEFAULT_WORKERS})")
+    apply_parser.add_argument("--keep-backup", action="store_true", help="mantém cópia de segurança do PCK original")
+    apply_parser.add_argument("--pck-tool", help="executável usado no lugar do GodotPCKExplorer")
+    apply_parser.set_defaults(handler=run_apply)
+
+    verify_parser = subparsers.add_parser("verify", help="confere se a tradução instalada está íntegra")
+    _add_common_arguments(verify_parser)
+    verify_parser.add_argument("--workers", type=int, default=None, help="threads de leitura (padrão: automático)")
+    verify_parser.add_argument("--chunk-size", type=int, default=VERIFY_CHUNK_SIZE,
+                               help=f"tamanho de cada leitura em bytes (padrão: {VERIFY_CHUNK_SIZE})")
+    verify_parser.set_defaults(handler=run_verify)
+
+    args = parser.parse_args(argv)
+    if not args.translations.exists():
+        parser.error(f"arquivos da tradução não encontrados em \"{args.translations}\"")
+    if args.key:
+        try:
+            set_encryption_key(args.key)
+        except CryptoError as e:
+            parser.error(str(e))
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
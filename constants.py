@@ -1,6 +1,7 @@
 GODOT_PCK_EXPLORER = "GodotPCKExplorer.Console.exe"
 MBEDTLS_FOLDER_NAME = "mbedTLS"
 BASE_TRANSLATION_PATH = "translation_files"
+TRANSLATION_BUNDLE_FILENAME = "translation_files.zip"
 DEMO_TRANSLATION_SUBDIR = "demo"
 FULL_TRANSLATION_SUBDIR = "full"
 MAIN_SUBDIR_NAME = "assets"
@@ -8,4 +9,30 @@ PCK_FILENAME = "UntilThen.pck"
 
 GODOT_VERSION_STR = "2.2.4.1"
 PATH_PREFIX_STRING = "assets/"
-DEMO_PCK_SIZE = 500  # em MB
\ No newline at end of file
+DEMO_PCK_SIZE = 500  # em MB
+DELTA_BACKUP_EXT = ".pckbak"
+PATCH_JOURNAL_EXT = ".journal"
+PCK_EXPLORER_TIMEOUT = 1800  # em segundos
+FREE_SPACE_MARGIN = 64 * 1024 * 1024  # folga além dos dados gravados, em bytes
+
+STEAM_APP_IDS = ("1574820",)  # Until Then (versão completa)
+# Pasta em steamapps/common -> app ID do jogo. Com app ID, a pasta só é procurada em bibliotecas do
+# formato antigo (sem bloco "apps"); sem ele (a demo), é conferida uma vez em cada biblioteca.
+STEAM_FALLBACK_INSTALL_DIRS = {"Until Then": "1574820", "Until Then Demo": None}
+
+CACHE_DIR_NAME = "UntilThenTraducaoPTBR"
+LOG_FILENAME = "instalador.log"
+LOG_FLUSH_INTERVAL_MS = 50
+VALIDATION_DEBOUNCE_MS = 300
+# build_id -> (tipo, descrição da build). Gere as entradas com
+# python -m fingerprint --label "<descrição>" <UntilThen.pck de cada build suportada>
+# Builds fora da tabela têm o tipo decidido por DEMO_PCK_SIZE, conferido com o conteúdo do PCK.
+KNOWN_GAME_BUILDS = {}
+# Chave AES-256 (64 caracteres hexadecimais) para PCKs criptografados
+PCK_KEY_ENV = "UNTILTHEN_PCK_KEY"
+PCK_KEY_FILENAME = "pck_key.txt"
+INSTALL_REPORT_FILENAME = "ultimo_relatorio.json"
+PROFILE_ENV = "UNTILTHEN_PROFILE"
+# Índice de cobertura (python -m coverage_index): só hashes de conteúdo, para ficar no git ao lado do
+# código; tamanhos, datas e o caminho do PCK de cada máquina ficam no cache do usuário.
+COVERAGE_INDEX_FILENAME = "cobertura.json"
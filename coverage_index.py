@@ -0,0 +1,332 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from bundle import VARIANT_SUBDIRS
+from constants import (BASE_TRANSLATION_PATH, COVERAGE_INDEX_FILENAME, MAIN_SUBDIR_NAME, PATH_PREFIX_STRING,
+                       PCK_FILENAME)
+from delta import EMPTY_MD5, md5_file
+from etc import user_cache_dir
+from fingerprint import TRANSLATABLE_PREFIXES, identify_build
+from pck import PACK_FILE_ENCRYPTED, AssetsError, PCKError, collect_assets
+from pck_crypto import CryptoError, set_encryption_key
+from pck_reader import PCKReader
+from progress import format_duration
+
+COVERAGE_INDEX_VERSION = 2
+COVERAGE_CACHE_FILENAME = "cobertura.json"
+# Só estes tipos são traduzidos; o resto das pastas de história (imagens, sons) não entra na cobertura.
+TRANSLATED_EXTENSIONS = (".inkb", ".json")
+# MD5s já instalados por caminho, para reconhecer no PCK a tradução em vez do original.
+TRANSLATED_HISTORY_SIZE = 8
+STATUS_LABELS = {
+    "ok": "atualizados",
+    "stale": "desatualizados",
+    "missing": "sem tradução",
+    "orphan": "sem original",
+    "unknown": "original desconhecido",
+}
+_DIGITS = re.compile(r"(\d+)")
+
+
+class CoverageReport:
+    __slots__ = ("variant", "build_id", "statuses", "stats")
+
+    def __init__(self, variant, build_id, statuses, stats):
+        self.variant = variant
+        self.build_id = build_id
+        self.statuses = statuses
+        self.stats = stats
+
+    def groups(self):
+        groups = {}
+        for key, status in self.statuses.items():
+            counts = groups.setdefault(group_of(key), dict.fromkeys(STATUS_LABELS, 0))
+            counts[status] += 1
+        return dict(sorted(groups.items(), key=lambda item: [_natural_key(part) for part in item[0]]))
+
+    def totals(self):
+        counts = dict.fromkeys(STATUS_LABELS, 0)
+        for status in self.statuses.values():
+            counts[status] += 1
+        return counts
+
+    def paths(self, status):
+        return sorted(key for key, value in self.statuses.items() if value == status)
+
+    def describe(self, list_paths=False):
+        columns = list(STATUS_LABELS)
+        header = f"{'capítulo / cena':<20}" + "".join(f"{STATUS_LABELS[name]:>{len(STATUS_LABELS[name]) + 3}}"
+                                                      for name in columns) + "   cobertura"
+        lines = [f"Cobertura da tradução ({self.variant}, build {self.build_id}):", header]
+
+        def row(label, counts):
+            translated = counts["ok"] + counts["stale"] + counts["unknown"]
+            total = translated + counts["missing"]
+            coverage = f"{translated / total:8.0%}" if total else f"{'-':>8}"
+            return (f"{label:<20}" + "".join(f"{counts[name]:>{len(STATUS_LABELS[name]) + 3}}" for name in columns)
+                    + f"   {coverage}")
+
+        for (section, chapter, scene), counts in self.groups().items():
+            label = f"{chapter} / {scene}" if section == "story" else section
+            lines.append(row(label, counts))
+        lines.append(row("total", self.totals()))
+        if list_paths:
+            for status in ("stale", "missing", "orphan", "unknown"):
+                paths = self.paths(status)
+                if paths:
+                    lines.append(f"\n{STATUS_LABELS[status].capitalize()}:")
+                    lines.extend(f"▪ {key}" for key in paths)
+        lines.append(f"\nÍndice atualizado em {format_duration(self.stats['elapsed'])}: "
+                     f"{self.stats['local_hashed']} arquivos da tradução e {self.stats['pck_hashed']} do PCK "
+                     f"recalculados{'' if self.stats['pck_read'] else ', PCK inalterado'}.")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "variant": self.variant,
+            "build_id": self.build_id,
+            "totals": self.totals(),
+            "groups": [{"section": section, "chapter": chapter, "scene": scene, **counts}
+                       for (section, chapter, scene), counts in self.groups().items()],
+            "paths": {status: self.paths(status) for status in STATUS_LABELS if status != "ok"},
+            "stats": self.stats,
+        }
+
+
+def _natural_key(text):
+    return [int(part) if part.isdigit() else part for part in _DIGITS.split(text)]
+
+
+def group_of(key):
+    # assets/story/<capítulo>/<cena>/arquivo; os demais diretórios traduzíveis formam um grupo cada.
+    parts = key[len(PATH_PREFIX_STRING):].split("/")
+    if parts[0] == "story" and len(parts) > 2:
+        return "story", parts[1], parts[2] if len(parts) > 3 else "-"
+    return parts[0], "", ""
+
+
+def is_translatable(key):
+    return key.startswith(TRANSLATABLE_PREFIXES) and key.endswith(TRANSLATED_EXTENSIONS)
+
+
+def load_coverage_index(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {"version": COVERAGE_INDEX_VERSION, "variants": {}}
+    if data.get("version") != COVERAGE_INDEX_VERSION:
+        raise ValueError(f"Versão de índice de cobertura não suportada: {data.get('version')}.")
+    return data
+
+
+def save_coverage_index(path, data):
+    # Ordenado e com uma entrada por linha: o índice pode ficar no git junto com a tradução.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def _cache_path():
+    return user_cache_dir() / COVERAGE_CACHE_FILENAME
+
+
+def load_coverage_cache():
+    # Sem o cache (outra máquina, cópia nova do repositório) tudo é apenas recalculado.
+    try:
+        return load_coverage_index(_cache_path())
+    except (OSError, ValueError):
+        return {"version": COVERAGE_INDEX_VERSION, "variants": {}}
+
+
+def save_coverage_cache(data):
+    try:
+        save_coverage_index(_cache_path(), data)
+    except OSError:
+        pass
+
+
+def _scan_local(assets_dir, entries):
+    # Só recalcula o MD5 de arquivos cujo tamanho ou data de modificação mudou desde a última vez.
+    current = {}
+    hashed = 0
+    for asset in collect_assets(assets_dir):
+        if not is_translatable(asset.key):
+            continue
+        st = os.stat(asset.source)
+        cached = entries.get(asset.key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            current[asset.key] = cached
+        else:
+            current[asset.key] = [st.st_size, st.st_mtime_ns, md5_file(asset.source).hex()]
+            hashed += 1
+    return current, hashed
+
+
+def _scan_pck(pck_path, previous):
+    # O diretório do PCK já traz o MD5 de cada arquivo; só entradas com MD5 zerado precisam ser lidas.
+    entries = {}
+    hashed = 0
+    with PCKReader(pck_path) as reader:
+        index = reader.index
+        for prefix in TRANSLATABLE_PREFIXES:
+            for i in index.prefix_range(prefix):
+                key = index.keys[i]
+                if not key.endswith(TRANSLATED_EXTENSIONS):
+                    continue
+                md5 = index.md5(i)
+                if md5 != EMPTY_MD5:
+                    entries[key] = [index.sizes[i], index.offsets[i], md5.hex()]
+                    continue
+                cached = previous.get(key)
+                if cached and cached[:2] == [index.sizes[i], index.offsets[i]]:
+                    entries[key] = cached
+                elif index.flags[i] & PACK_FILE_ENCRYPTED:
+                    entries[key] = [index.sizes[i], index.offsets[i], None]
+                else:
+                    with reader.read_at(i) as data:
+                        entries[key] = [index.sizes[i], index.offsets[i], hashlib.md5(data).hexdigest()]
+                    hashed += 1
+    return entries, hashed
+
+
+def update_index(data, pck_path, assets_dir, variant=None, accept=(), cache=None):
+    # data é o índice versionado (só MD5s); cache guarda o que só vale nesta máquina: tamanhos e datas dos
+    # arquivos da tradução e as entradas do PCK, reaproveitadas enquanto ele não mudar.
+    start = time.perf_counter()
+    build = identify_build(pck_path)
+    variant = variant or build.variant
+    state = data["variants"].setdefault(variant, {
+        "build_id": None, "originals": {}, "local": {}, "base": {}, "translated": {}, "added": []})
+    cached = (cache or {"variants": {}})["variants"].setdefault(variant, {
+        "assets_dir": None, "local": {}, "pck": None, "entries": {}})
+
+    assets_stamp = str(Path(assets_dir).resolve())
+    if cached["assets_dir"] != assets_stamp:
+        cached["assets_dir"] = assets_stamp
+        cached["local"] = {}
+    cached["local"], local_hashed = _scan_local(assets_dir, cached["local"])
+    local = {key: md5 for key, (_, _, md5) in cached["local"].items()}
+    st = Path(pck_path).stat()
+    stamp = [str(Path(pck_path).resolve()), st.st_size, st.st_mtime_ns]
+    pck_read = cached["pck"] != stamp
+    pck_hashed = 0
+    if pck_read:
+        cached["entries"], pck_hashed = _scan_pck(pck_path, cached["entries"])
+        cached["pck"] = stamp
+    entries = cached["entries"]
+    state["build_id"] = build.build_id
+
+    originals = state["originals"]
+    translated = state["translated"]
+    for key, md5 in local.items():
+        history = translated.setdefault(key, [])
+        if md5 not in history:
+            history.append(md5)
+            del history[:-TRANSLATED_HISTORY_SIZE]
+    # Uma entrada do PCK que coincide com uma versão da tradução é a tradução instalada, não o original.
+    for key, (size, _, md5) in entries.items():
+        if md5 is not None and md5 not in translated.get(key, ()):
+            originals[key] = [size, md5]
+    for key in list(originals):
+        if key not in entries:
+            del originals[key]
+    # Arquivos que o jogo não tinha e a instalação incluiu continuam sem original depois de instalados.
+    added = {key for key in state["added"] if key in local and key not in originals}
+    added.update(key for key in local if key not in entries)
+    state["added"] = sorted(added)
+
+    # A base é o original sobre o qual a tradução foi feita: muda quando o tradutor edita o arquivo
+    # (ou aceita a revisão); se o jogo trouxer outro original depois disso, a tradução está desatualizada.
+    base = state["base"]
+    previous_local = state["local"]
+    for key, md5 in local.items():
+        original = originals.get(key)
+        edited = previous_local.get(key) != md5
+        if original and (edited or key not in base or any(key.startswith(prefix) for prefix in accept)):
+            base[key] = original[1]
+    for key in list(base):
+        if key not in local:
+            del base[key]
+    for key in list(translated):
+        if key not in local:
+            del translated[key]
+    state["local"] = local
+
+    statuses = {}
+    for key in local.keys() | entries.keys():
+        original = originals.get(key)
+        if key not in local:
+            if original:
+                statuses[key] = "missing"
+        elif key in added:
+            statuses[key] = "orphan"
+        elif not original or key not in base:
+            statuses[key] = "unknown"
+        else:
+            statuses[key] = "ok" if base[key] == original[1] else "stale"
+
+    stats = {"local_hashed": local_hashed, "pck_hashed": pck_hashed, "pck_read": pck_read,
+             "elapsed": round(time.perf_counter() - start, 4)}
+    return CoverageReport(variant, build.build_id, statuses, stats)
+
+
+def main(argv=None):
+    application_path = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(prog="python -m coverage_index",
+                                     description="Cobertura da tradução e arquivos desatualizados após "
+                                                 "atualizações do jogo, por capítulo e cena.")
+    parser.add_argument("game", type=Path,
+                        help=f"pasta do jogo ou arquivo \"{PCK_FILENAME}\" com os arquivos originais")
+    parser.add_argument("--translations", type=Path, default=application_path / BASE_TRANSLATION_PATH,
+                        help="pasta com os arquivos da tradução")
+    parser.add_argument("--variant", choices=sorted(VARIANT_SUBDIRS),
+                        help="versão do jogo (padrão: detectada no PCK)")
+    parser.add_argument("--index", type=Path, default=application_path / COVERAGE_INDEX_FILENAME,
+                        help="arquivo do índice, para versionar junto com o código (padrão: %(default)s)")
+    parser.add_argument("--accept", nargs="+", default=(), metavar="CAMINHO",
+                        help="marca como revisados os arquivos com estes prefixos (ex.: assets/story/1/1a/)")
+    parser.add_argument("--list", action="store_true", help="lista os arquivos que precisam de atenção")
+    parser.add_argument("--json", action="store_true", help="mostra o relatório em JSON")
+    parser.add_argument("--key", help="chave AES-256 em hexadecimal, se o PCK for criptografado")
+    args = parser.parse_args(argv)
+    if args.key:
+        try:
+            set_encryption_key(args.key)
+        except CryptoError as e:
+            parser.error(str(e))
+
+    pck_path = args.game / PCK_FILENAME if args.game.is_dir() else args.game
+    if not args.translations.is_dir():
+        parser.error(f"\"{args.translations}\" não é uma pasta de tradução.")
+    try:
+        data = load_coverage_index(args.index)
+        cache = load_coverage_cache()
+        variant = args.variant or identify_build(pck_path).variant
+        assets_dir = args.translations / VARIANT_SUBDIRS[variant] / MAIN_SUBDIR_NAME
+        report = update_index(data, pck_path, assets_dir, variant, args.accept, cache)
+        save_coverage_index(args.index, data)
+        save_coverage_cache(cache)
+    except (OSError, ValueError, PCKError, AssetsError) as e:
+        print(f"ERRO: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        print(report.describe(args.list))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
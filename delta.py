@@ -0,0 +1,45 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from pck import COPY_CHUNK_SIZE, PACK_FILE_ENCRYPTED
+from pck_reader import PCKReader
+from progress import ProgressTracker
+
+EMPTY_MD5 = bytes(16)
+
+
+def md5_file(path, chunk_size=COPY_CHUNK_SIZE):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            md5.update(chunk)
+    return md5.digest()
+
+
+def compute_delta(pck_path, assets, workers=None, progress=None):
+    with PCKReader(pck_path) as reader:
+        index = reader.index
+
+        def needs_patch(asset):
+            if asset.key not in index:
+                return True
+            i = index.position(asset.key)
+            # Em entradas criptografadas o tamanho e o MD5 do índice são dos dados originais.
+            if index.sizes[i] != asset.size:
+                return True
+            stored_md5 = index.md5(i)
+            # Alguns empacotadores gravam o MD5 zerado; nesse caso compara com os dados do próprio PCK.
+            if stored_md5 == EMPTY_MD5:
+                if index.flags[i] & PACK_FILE_ENCRYPTED:
+                    return True
+                with reader.read_at(i) as data:
+                    stored_md5 = hashlib.md5(data).digest()
+            return (asset.md5 or md5_file(asset.source)) != stored_md5
+
+        tracker = ProgressTracker(progress, "Comparando", sum(a.size for a in assets), len(assets))
+        changed = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for asset, is_changed in zip(assets, executor.map(needs_patch, assets)):
+                changed.append(is_changed)
+                tracker.advance(asset.size, current=asset.key)
+    return [asset for asset, is_changed in zip(assets, changed) if is_changed]
@@ -0,0 +1,122 @@
+import errno
+import os
+import sys
+from pathlib import Path
+
+FILE_COPY_CHUNK_SIZE = 8 * 1024 * 1024
+_FICLONE = 0x40049409  # ioctl do Linux para reflink (btrfs, XFS)
+
+
+class InsufficientSpaceError(OSError):
+    def __init__(self, folder, required, available):
+        mb = 1024 * 1024
+        super().__init__(f"Espaço livre insuficiente em \"{folder}\": são necessários {required / mb:.0f} MB, "
+                         f"mas há apenas {available / mb:.0f} MB disponíveis.")
+        self.folder = folder
+        self.required = required
+        self.available = available
+
+
+def ensure_free_space(folder, required):
+    # Confere antes de gravar, para não ficar sem espaço no meio da operação.
+    # shutil é importado aqui para não pesar na abertura do instalador.
+    import shutil
+    available = shutil.disk_usage(folder).free
+    if available < required:
+        raise InsufficientSpaceError(folder, required, available)
+    return available
+
+
+def _fsync_dir(folder):
+    # No Windows não é possível abrir pastas para fsync; a renomeação no NTFS já é registrada no journal.
+    if os.name == 'nt':
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _tmp_path(path):
+    return path.with_name(path.name + ".tmp")
+
+
+def _reflink(src, dst):
+    if sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            raise OSError(ctypes.get_errno(), "clonefile falhou")
+        return
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflink não suportado") from None
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.unlink(dst)
+            raise
+
+
+def copy_durable(src, dst, chunk_size=FILE_COPY_CHUNK_SIZE):
+    # Cópia em blocos para um temporário, com fsync antes de aparecer com o nome final.
+    src, dst = Path(src), Path(dst)
+    ensure_free_space(dst.parent, src.stat().st_size)
+    tmp = _tmp_path(dst)
+    try:
+        with open(src, "rb") as s, open(tmp, "wb") as d:
+            while chunk := s.read(chunk_size):
+                d.write(chunk)
+            d.flush()
+            os.fsync(d.fileno())
+        import shutil
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+    _fsync_dir(dst.parent)
+
+
+def keep_copy(src, dst):
+    # Guarda uma cópia de src em dst sem duplicar os dados sempre que possível. Devolve o método usado.
+    # dst só passa a existir quando está completo, então uma interrupção não deixa cópia pela metade.
+    src, dst = Path(src), Path(dst)
+    try:
+        os.link(src, dst)
+        _fsync_dir(dst.parent)
+        return "hardlink"
+    except OSError:
+        pass
+    tmp = _tmp_path(dst)
+    try:
+        _reflink(src, tmp)
+        os.replace(tmp, dst)
+        _fsync_dir(dst.parent)
+        return "reflink"
+    except OSError:
+        if tmp.exists():
+            tmp.unlink()
+    copy_durable(src, dst)
+    return "copy"
+
+
+def replace_file(src, dst):
+    # Troca atômica: dst é sempre o arquivo antigo ou o novo, nunca some nem fica pela metade.
+    src, dst = Path(src), Path(dst)
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # Volumes diferentes: copia para o lado de dst e só então troca.
+        staged = dst.with_name(dst.name + ".new")
+        copy_durable(src, staged)
+        os.replace(staged, dst)
+        src.unlink()
+    _fsync_dir(dst.parent)
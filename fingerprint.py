@@ -0,0 +1,135 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+from constants import DEMO_PCK_SIZE, KNOWN_GAME_BUILDS, PATH_PREFIX_STRING
+from etc import user_cache_dir
+from pck_reader import load_index
+
+FINGERPRINT_CACHE_FILENAME = "builds.json"
+# A tradução só altera estes diretórios; eles ficam fora do ID para que ele não mude após a instalação.
+TRANSLATABLE_PREFIXES = (PATH_PREFIX_STRING + "story/", PATH_PREFIX_STRING + "databases/")
+FULL_GAME_MARKER = PATH_PREFIX_STRING + "story/2/"
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def variant_by_size(pck_size):
+    return "Demo" if pck_size / (1024 * 1024) < DEMO_PCK_SIZE else "Completa"
+
+
+class GameBuild:
+    __slots__ = ("build_id", "detected_variant", "godot_version", "entry_count", "size_variant")
+
+    def __init__(self, build_id, detected_variant, godot_version, entry_count, size_variant):
+        self.build_id = build_id
+        self.detected_variant = detected_variant
+        self.godot_version = godot_version
+        self.entry_count = entry_count
+        self.size_variant = size_variant
+
+    @property
+    def known(self):
+        return self.build_id in KNOWN_GAME_BUILDS
+
+    @property
+    def variant(self):
+        # Fora da tabela, vale o tamanho do PCK (a regra de sempre); o conteúdo só serve de conferência.
+        return KNOWN_GAME_BUILDS[self.build_id][0] if self.known else self.size_variant
+
+    @property
+    def variant_mismatch(self):
+        return not self.known and self.detected_variant != self.size_variant
+
+    @property
+    def label(self):
+        return KNOWN_GAME_BUILDS[self.build_id][1] if self.known else None
+
+    @property
+    def outdated_translation_risk(self):
+        # Só dá para afirmar que a build é diferente quando há builds conhecidas do mesmo tipo.
+        return not self.known and any(v == self.variant for v, _ in KNOWN_GAME_BUILDS.values())
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def compute_build(pck_path):
+    index = load_index(pck_path)
+    digest = hashlib.sha1()
+    for i, key in enumerate(index.keys):
+        if not key.startswith(TRANSLATABLE_PREFIXES):
+            digest.update(key.encode("utf-8"))
+            digest.update(index.sizes[i].to_bytes(8, "little"))
+            digest.update(index.md5(i))
+    is_full = len(index.prefix_range(FULL_GAME_MARKER)) > 0
+    return GameBuild(digest.hexdigest()[:16], "Completa" if is_full else "Demo", index.header.godot_version, len(index),
+                     variant_by_size(Path(pck_path).stat().st_size))
+
+
+def _cache_path():
+    return user_cache_dir() / FINGERPRINT_CACHE_FILENAME
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(_cache_path(), "r", encoding="utf-8") as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache(cache):
+    cache_path = _cache_path()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def identify_build(pck_path):
+    pck_path = Path(pck_path).resolve()
+    st = pck_path.stat()
+    stamp = [st.st_size, st.st_mtime_ns]
+    with _cache_lock:
+        cached = _load_cache().get(str(pck_path))
+    if cached and cached.get("stamp") == stamp and all(name in cached for name in GameBuild.__slots__):
+        return GameBuild(*(cached[name] for name in GameBuild.__slots__))
+
+    build = compute_build(pck_path)
+    with _cache_lock:
+        cache = _load_cache()
+        cache[str(pck_path)] = {"stamp": stamp, **build.to_dict()}
+        _save_cache(cache)
+    return build
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m fingerprint", description="Calcula o ID de build de PCKs do jogo.")
+    parser.add_argument("pcks", nargs="+", help="arquivos .pck de builds conferidas")
+    parser.add_argument("--label", help=f"descrição da build; mostra a entrada pronta para KNOWN_GAME_BUILDS "
+                                        f"(constants.py)")
+    args = parser.parse_args(argv)
+    for pck_path in args.pcks:
+        build = compute_build(pck_path)
+        if args.label:
+            print(f"    {build.build_id!r}: ({build.detected_variant!r}, {args.label!r}),")
+        else:
+            print(json.dumps({"path": pck_path, **build.to_dict()}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,27 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
-import subprocess
 import sys
-import shutil
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from constants import *
-from etc import steam_game_path
+from etc import user_cache_dir
+from instrumentation import Instrumentation
+from logsink import LOG_MAX_LINES, LogSink
+from patching import (PatchError, TranslationPatcher, ValidationError, check_pck_explorer, find_pck_explorer,
+                      find_translations, restorable_backup, restore_original, translation_assets)
+from steam import find_game_installs
+from validation import validate_game_folder
 from ui import setup_styles, create_widgets
 
 
 class TranslationSetup:
-    def __init__(self, root):
+    def __init__(self, root, started_at=None):
         self.root = root
+        self.started_at = started_at if started_at is not None else time.perf_counter()
         self.root.title("Instalador da Tradução de Until Then [PT-BR]")
         self.root.geometry("650x580")
         self.root.resizable(False, False)
@@ -28,8 +35,8 @@ class TranslationSetup:
         self.game_folder_var.trace_add("write", self._on_path_changed)
         self.keep_backup_var = tk.BooleanVar(value=False)
 
-        self.pck_explorer_path = self._find_pck_explorer()
-        self.base_translation_path = self.application_path / BASE_TRANSLATION_PATH
+        self.pck_explorer_path = None
+        self.translations_path = None
         self.game_pck_filepath = None
         self.selected_translation_assets = None
         self.translation_type = None
@@ -37,80 +44,131 @@ class TranslationSetup:
         self.patch_applied_to_path = None
         self._initial_autodetect_failed = False
         self.patch_thread_running = False
+        self._latest_progress = None
+        self._validation_generation = 0
+        self._validation_after = None
+        self._validation_future = None
+        self._last_validation_seconds = None
+        self.last_report = None
+        self._details_visible = False
 
-        self.pck_explorer_ready = False
         self.translation_folder_ready = False
 
+        self.log_sink = LogSink(log_file=user_cache_dir() / LOG_FILENAME)
+        self._log_has_text = False
+
         setup_styles(self)
         create_widgets(self)
+        self._log_tick()
+
+        # Verificações de disco e a busca na Steam podem demorar (unidades de rede ou em repouso);
+        # rodam fora da thread da interface para a janela aparecer imediatamente.
+        self._set_path_status("Procurando a pasta do jogo...")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="background")
+        self._executor.submit(self._run_startup_tasks)
+        self.root.after_idle(self._report_first_paint)
+
+    def _report_first_paint(self):
+        elapsed_ms = (time.perf_counter() - self.started_at) * 1000
+        self.log_sink.trace(f"Janela exibida em {elapsed_ms:.0f} ms.")
 
-        self._initial_checks()
-        self._auto_detect_game_folder()
+    def _set_path_status(self, text):
+        self.path_status_label.config(text=text)
+
+    def _run_startup_tasks(self):
+        pck_explorer_path = find_pck_explorer(self.application_path)
+        try:
+            check_pck_explorer(pck_explorer_path, self.application_path)
+            explorer_error = None
+        except ValidationError as e:
+            explorer_error = e
+        translations_path = find_translations(self.application_path)
+        self.root.after(0, self._initial_checks, pck_explorer_path, explorer_error,
+                        translations_path if translations_path.exists() else None)
 
-    def _auto_detect_game_folder(self):
-        detected_path = steam_game_path()
-        if detected_path:
-            self.game_folder_var.set(detected_path)
+        try:
+            installs = find_game_installs()
+        except Exception:
+            installs = []
+        self.root.after(0, self._auto_detect_game_folder, installs)
+
+    def _auto_detect_game_folder(self, installs):
+        self._set_path_status("")
+        self.log_sink.trace(f"Detecção inicial concluída em {(time.perf_counter() - self.started_at) * 1000:.0f} ms.")
+        if self.game_folder_var.get():
+            return
+        if installs:
+            if len(installs) > 1:
+                self.log("Mais de uma instalação do jogo encontrada na Steam:\n" +
+                         "\n".join(f"▪ {install.name}: \"{install.path}\"" for install in installs))
+            self.game_folder_var.set(installs[0].path)
         else:
             self.log("Pasta do jogo não encontrada automaticamente. Por favor, selecione manualmente.")
             self._initial_autodetect_failed = True
 
-    def _initial_checks(self):
-        pck_explorer_dir = Path(self.pck_explorer_path).parent if self.pck_explorer_path else self.application_path
-        mbedtls_dir = pck_explorer_dir / MBEDTLS_FOLDER_NAME
-
-        if not self.pck_explorer_path or not os.access(self.pck_explorer_path, os.X_OK):
-            self.log(f"ERRO CRÍTICO: \"{GODOT_PCK_EXPLORER}\" não foi encontrado ou não é executável.", error=True,
-                     show_popup=True, popup_title="Componente Essencial Faltando")
-            self.pck_explorer_ready = False
-        elif not mbedtls_dir.is_dir():
-            self.log(
-                f"ERRO: Pasta \"{MBEDTLS_FOLDER_NAME}\" não encontrada. Ela é uma dependência de {GODOT_PCK_EXPLORER}.",
-                error=True, show_popup=True, popup_title="Dependência Faltando")
-            self.pck_explorer_ready = False
+    def _initial_checks(self, pck_explorer_path, explorer_error, translations_path):
+        self.translations_path = translations_path
+        if explorer_error:
+            # A tradução é gravada diretamente no PCK; o explorer só é usado quando isso não é possível.
+            self.log(f"Aviso: {explorer_error} O \"{GODOT_PCK_EXPLORER}\" só é necessário para PCKs em formato "
+                     f"não suportado.")
+            self.pck_explorer_path = None
         else:
-            self.pck_explorer_ready = True
+            self.pck_explorer_path = pck_explorer_path
 
-        if not self.base_translation_path.is_dir():
+        if translations_path is None:
             self.log(f"ERRO: Pasta de tradução \"{BASE_TRANSLATION_PATH}\" não encontrada!", error=True,
                      show_popup=True, popup_title="Erro Crítico de Arquivos")
             self.translation_folder_ready = False
         else:
             self.translation_folder_ready = True
 
-        if not self.pck_explorer_ready or not self.translation_folder_ready:
-            if hasattr(self, 'apply_button'): self.apply_button.config(state=tk.DISABLED)
+        if not self.translation_folder_ready:
+            self.apply_button.config(state=tk.DISABLED)
+        elif self.game_folder_var.get():
+            # O usuário pode ter escolhido a pasta antes de as verificações terminarem.
+            self._request_validation(0)
 
     def log(self, message, error=False, show_popup=False, popup_title="Aviso"):
-        self.status_text.config(state=tk.NORMAL)
-        if self.status_text.get("1.0", tk.END).strip():
-            self.status_text.insert(tk.END, "\n")
+        self.log_sink.push(message, error, popup_title if show_popup else None)
+
+    def _flush_log(self):
+        records = self.log_sink.drain()
+        if not records:
+            return
 
-        tag = "error_tag" if error else "info_tag"
-        self.status_text.insert(tk.END, message, tag)
+        self.status_text.config(state=tk.NORMAL)
+        for record in records:
+            if self._log_has_text:
+                self.status_text.insert(tk.END, "\n")
+            tag = "error_tag" if record.error else "info_tag"
+            self.status_text.insert(tk.END, record.message, tag)
+            self._log_has_text = True
+
+        line_count = int(self.status_text.index("end-1c").split(".")[0])
+        if line_count > LOG_MAX_LINES:
+            self.status_text.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
         self.status_text.see(tk.END)
         self.status_text.config(state=tk.DISABLED)
-        self.root.update_idletasks()
 
-        if show_popup:
-            if error:
-                messagebox.showerror(popup_title, message)
+        for record in records:
+            if record.popup_title is None:
+                continue
+            if record.error:
+                messagebox.showerror(record.popup_title, record.message)
             else:
-                messagebox.showwarning(popup_title, message)
+                messagebox.showwarning(record.popup_title, record.message)
+
+    def _log_tick(self):
+        self._flush_log()
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self._log_tick)
 
     def _clear_log(self):
+        self.log_sink.drain()
         self.status_text.config(state=tk.NORMAL)
         self.status_text.delete('1.0', tk.END)
         self.status_text.config(state=tk.DISABLED)
-
-    def _find_pck_explorer(self):
-        candidate = self.application_path / GODOT_PCK_EXPLORER
-        if candidate.is_file():
-            return str(candidate)
-        if not getattr(sys, 'frozen', False):
-            if shutil.which(GODOT_PCK_EXPLORER):
-                return GODOT_PCK_EXPLORER
-        return None
+        self._log_has_text = False
 
     def browse_game_folder(self):
         folder = filedialog.askdirectory(title="Selecione a pasta de instalação do jogo")
@@ -121,70 +179,87 @@ class TranslationSetup:
         if self._initial_autodetect_failed:
             self._clear_log()
             self._initial_autodetect_failed = False
-        self._validate_game_path()
+        self._request_validation()
+
+    def _request_validation(self, delay=VALIDATION_DEBOUNCE_MS):
+        # Cada alteração invalida a validação anterior; só a última chega à interface.
+        self._validation_generation += 1
+        if self._validation_after is not None:
+            self.root.after_cancel(self._validation_after)
+            self._validation_after = None
+        if self._validation_future is not None:
+            self._validation_future.cancel()
+            self._validation_future = None
 
-    def _validate_game_path(self):
         current_path = self.game_folder_var.get()
         if self.patch_applied_to_path == current_path:
+            self._set_path_status("")
             return
 
         self.apply_button.config(state=tk.DISABLED)
+        self.restore_button.config(state=tk.DISABLED)
+        self.verify_button.config(state=tk.DISABLED)
         self.game_pck_filepath = None
         self.selected_translation_assets = None
         self.translation_type = None
+        self._set_path_status("Verificando a pasta..." if current_path else "")
+        self._validation_after = self.root.after(delay, self._submit_validation, self._validation_generation)
 
-        if not self.pck_explorer_ready or not self.translation_folder_ready:
+    def _submit_validation(self, generation):
+        self._validation_after = None
+        self._validation_future = self._executor.submit(self._run_validation, generation,
+                                                        self.game_folder_var.get())
+
+    def _run_validation(self, generation, path):
+        if generation != self._validation_generation:
             return
+        start = time.perf_counter()
+        result = validate_game_folder(path)
+        self.root.after(0, self._apply_validation, generation, result, time.perf_counter() - start)
 
-        if not current_path or not Path(current_path).is_dir():
+    def _apply_validation(self, generation, result, elapsed=None):
+        if generation != self._validation_generation:
             return
+        self._validation_future = None
+        self._last_validation_seconds = elapsed
+        self._set_path_status("")
 
-        pck_path = self._check_pck_file(current_path)
-        if not pck_path:
+        if not self.translation_folder_ready:
+            return
+        if result.stamp is None:
             return
 
-        if current_path != self.last_validated_path:
-            self.log(f"Pasta do jogo selecionada: \"{current_path}\".")
+        if result.pck_path is None:
+            self.log(str(result.error), error=True)
+            self.last_validated_path = None
+            return
 
-        self.game_pck_filepath = pck_path
+        if result.path != self.last_validated_path:
+            self.log(f"Pasta do jogo selecionada: \"{result.path}\".")
+        self.game_pck_filepath = result.pck_path
         self.log(f"Arquivo \"{PCK_FILENAME}\" encontrado com sucesso.")
+        for message, error in result.messages:
+            self.log(message, error=error)
 
-        version_type = self._get_game_version()
-        if not version_type:
+        if result.error is not None:
+            self.log(str(result.error), error=True, show_popup=result.error.show_popup)
+            self.last_validated_path = None
             return
 
-        sub_dir = DEMO_TRANSLATION_SUBDIR if version_type == "Demo" else FULL_TRANSLATION_SUBDIR
-        self.selected_translation_assets = str(self.base_translation_path / sub_dir / MAIN_SUBDIR_NAME)
+        self.translation_type = result.variant
+        self.selected_translation_assets = translation_assets(self.translations_path, self.translation_type)
 
         self.log(f"Versão do jogo: {self.translation_type}.")
-        self.last_validated_path = current_path
+        self.last_validated_path = result.path
 
+        self.restore_button.config(state=tk.NORMAL if result.backup else tk.DISABLED)
+        self.verify_button.config(state=tk.NORMAL)
         if self._is_ready_to_patch():
             self.apply_button.config(state=tk.NORMAL)
             self.log("\nO instalador agora está com tudo pronto. Clique em \"Aplicar\" para continuar.\n")
 
-    def _check_pck_file(self, game_folder):
-        pck_candidate = Path(game_folder) / PCK_FILENAME
-        if not pck_candidate.is_file():
-            self.log(f"ERRO: Arquivo \"{PCK_FILENAME}\" não encontrado em \"{game_folder}\".", error=True)
-            self.last_validated_path = None
-            return None
-        return str(pck_candidate)
-
-    def _get_game_version(self):
-        try:
-            pck_size_mb = Path(self.game_pck_filepath).stat().st_size / (1024 * 1024)
-            is_demo = pck_size_mb < DEMO_PCK_SIZE
-            self.translation_type = "Demo" if is_demo else "Completa"
-            return self.translation_type
-        except Exception as e:
-            self.log(f"ERRO inesperado ao ler o arquivo PCK: {e}", error=True, show_popup=True)
-            self.last_validated_path = None
-            return None
-
     def _is_ready_to_patch(self):
         return all([
-            self.pck_explorer_ready,
             self.translation_folder_ready,
             self.game_pck_filepath,
             self.selected_translation_assets,
@@ -198,150 +273,223 @@ class TranslationSetup:
             return False
         return True
 
-    def _split_pck_filename(self):
-        p = Path(PCK_FILENAME)
-        return p.stem, p.suffix
-
-    def _get_temp_pck_filepath(self):
-        if not self.game_pck_filepath: return None
-        game_folder = Path(self.game_pck_filepath).parent
-        base, ext = self._split_pck_filename()
-        return str(game_folder / f"{base}_Translated_PTBR_TEMP{ext}")
-
-    def _get_backup_filepath(self):
-        if not self.game_pck_filepath: return None
-        game_dir = Path(self.game_pck_filepath).parent
-        base, ext = self._split_pck_filename()
-        return str(game_dir / f"{base}OLD{ext}")
-
     def _show_progress_bar(self):
         self.progress_bar_frame.pack(pady=(10, 5), fill=tk.X, padx=5)
         self.progress_bar.pack(fill=tk.X, expand=True)
+        self.progress_label.pack(anchor=tk.W)
         self.progress_bar['value'] = 0
+        self.progress_label.config(text="")
+        self._latest_progress = None
         self.patch_thread_running = True
-        self._update_progress_bar_animation()
+        self._update_progress_bar()
 
     def _hide_progress_bar(self):
         self.patch_thread_running = False
         self.root.after(300, self.progress_bar_frame.pack_forget)
 
-    def _update_progress_bar_animation(self):
+    def _on_progress(self, event):
+        # Chamado nas threads de trabalho; a interface só lê o evento mais recente no próximo tick.
+        self._latest_progress = event
+
+    def _update_progress_bar(self):
         if self.patch_thread_running:
-            if self.progress_bar['value'] < 95:
-                self.progress_bar['value'] += 1
-            self.root.after(75, self._update_progress_bar_animation)
+            event = self._latest_progress
+            if event is not None:
+                self.progress_bar['value'] = event.fraction * 100
+                self.progress_label.config(text=event.describe())
+            self.root.after(100, self._update_progress_bar)
 
     def start_patch_thread(self):
         if not self._ensure_ready_to_patch():
             return
 
-        backup_path = self._get_backup_filepath()
-        if self.keep_backup_var.get() and backup_path and not Path(backup_path).exists():
-            try:
-                pck_size_gb = Path(self.game_pck_filepath).stat().st_size / (1024 * 1024 * 1024)
-                msg = f"Tem certeza que deseja manter uma cópia de segurança do arquivo original?\nEla ocupará aproximadamente {pck_size_gb:.2f} GB de espaço adicional."
-                if not messagebox.askyesno("Confirmar Cópia", msg):
-                    self.log("Aplicação cancelada pelo usuário.")
-                    return
-            except Exception:
-                pass
+        self._disable_controls()
+        self._show_progress_bar()
+        threading.Thread(target=self._execute_patch, daemon=True).start()
 
+    def _disable_controls(self):
         self.apply_button.config(state=tk.DISABLED)
+        self.restore_button.config(state=tk.DISABLED)
+        self.verify_button.config(state=tk.DISABLED)
         self.browse_button.config(state=tk.DISABLED)
         self.path_entry.config(state=tk.DISABLED)
 
-        self._show_progress_bar()
-        threading.Thread(target=self._execute_patch, daemon=True).start()
+    def _get_restorable_backup(self):
+        if not self.game_pck_filepath: return None
+        return restorable_backup(self.game_pck_filepath)
 
-    def _execute_patch(self):
-        temp_pck_file = self._get_temp_pck_filepath()
-        command = [
-            self.pck_explorer_path, "-pc", self.game_pck_filepath,
-            self.selected_translation_assets, temp_pck_file,
-            GODOT_VERSION_STR, PATH_PREFIX_STRING
-        ]
+    def _update_restore_button(self):
+        self.restore_button.config(state=tk.NORMAL if self._get_restorable_backup() else tk.DISABLED)
 
-        try:
-            startupinfo = None
-            if os.name == 'nt':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-
-            process = subprocess.Popen(
-                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                text=True, startupinfo=startupinfo, encoding='utf-8', errors='replace'
-            )
-            stdout, stderr = process.communicate(timeout=1800)
-
-            if process.returncode == 0:
-                self.root.after(0, self.log, "Tradução aplicada com sucesso ao arquivo temporário.")
-                self._finalize_patch(temp_pck_file)
-            else:
-                error_output = f"\"{Path(self.pck_explorer_path).name}\" falhou (código: {process.returncode}).\n\nDetalhes:\n{stderr.strip()}"
-                self.root.after(0, self._process_patch_result, False, "Erro na Aplicação", error_output)
-                if Path(temp_pck_file).exists(): Path(temp_pck_file).unlink()
+    def start_restore_thread(self):
+        backup_path = self._get_restorable_backup()
+        if not backup_path:
+            return
+        msg = (f"Deseja remover a tradução e restaurar o \"{PCK_FILENAME}\" original "
+               f"a partir da cópia \"{backup_path.name}\"?")
+        if not messagebox.askyesno("Restaurar Original", msg):
+            return
+
+        self._disable_controls()
+        self._show_progress_bar()
+        threading.Thread(target=self._execute_restore, args=(backup_path,), daemon=True).start()
 
-        except subprocess.TimeoutExpired:
-            self.root.after(0, self._process_patch_result, False, "Erro de Timeout",
-                            "A operação demorou mais de 30 minutos.")
+    def _execute_restore(self, backup_path):
+        try:
+            self.log(f"Restaurando \"{PCK_FILENAME}\" a partir de \"{backup_path.name}\"...")
+            restore_original(self.game_pck_filepath, backup_path)
+            self.root.after(0, self._process_restore_result, True, "Restauração Concluída!",
+                            f"O arquivo original \"{PCK_FILENAME}\" foi restaurado.")
         except Exception as e:
-            self.root.after(0, self._process_patch_result, False, "Erro Inesperado",
-                            f"Aconteceu algum erro durante a aplicação: {e}")
+            self.root.after(0, self._process_restore_result, False, "Erro na Restauração",
+                            f"Não foi possível restaurar o arquivo original: {e}")
 
-    def _finalize_patch(self, temp_pck_file):
+    def start_verify_thread(self):
+        if not self.game_pck_filepath or not self.selected_translation_assets:
+            return
+        self._disable_controls()
+        self._show_progress_bar()
+        threading.Thread(target=self._execute_verify, daemon=True).start()
+
+    def _execute_verify(self):
+        patcher = TranslationPatcher(self.game_pck_filepath, self.selected_translation_assets, log=self.log,
+                                     progress=self._on_progress, instrumentation=self._new_instrumentation())
         try:
-            final_pck_path = self.game_pck_filepath
-            backup_path_str = self._get_backup_filepath()
-            backup_path = Path(backup_path_str) if backup_path_str else None
-            backup_filename = backup_path.name if backup_path else "UntilThenOLD.pck"
-
-            result_details_backup_line = ""
-
-            if self.keep_backup_var.get():
-                if backup_path and not backup_path.exists():
-                    self.log(f"Criando cópia do arquivo original como \"{backup_filename}\"...")
-                    shutil.move(self.game_pck_filepath, backup_path_str)
-                    self.log(f"Cópia \"{backup_filename}\" criado.")
-                    result_details_backup_line = f"▪ Cópia do arquivo original: \"{backup_filename}\"\n"
-                else:
-                    self.log(f"Removendo \"{PCK_FILENAME}\" atual...")
-                    game_pck_path = Path(self.game_pck_filepath)
-                    if game_pck_path.exists(): game_pck_path.unlink()
-                    result_details_backup_line = f"▪ Cópia anterior preservada: \"{backup_filename}\"\n"
+            self.log(f"Verificando os arquivos da tradução em \"{PCK_FILENAME}\"...")
+            with patcher.instrumentation.profiled():
+                report = patcher.verify()
+            if report.ok:
+                result = (True, "Verificação Concluída",
+                          f"Todos os arquivos da tradução estão corretos.\n\n{report.describe()}")
             else:
-                self.log(f"Substituindo arquivo original \"{PCK_FILENAME}\"...")
-                game_pck_path = Path(self.game_pck_filepath)
-                if game_pck_path.exists(): game_pck_path.unlink()
-                result_details_backup_line = "▪ Arquivo original substituído.\n"
-
-            shutil.move(temp_pck_file, final_pck_path)
-            self.log(f"\n\"{PCK_FILENAME}\" traduzido instalado.")
+                result = (False, "Problemas Encontrados",
+                          f"{report.describe()}\n\n{report.failure_details()}\n\n"
+                          f"Restaure o arquivo original (ou verifique os arquivos do jogo na Steam) e aplique a tradução novamente.")
+        except PatchError as e:
+            result = (False, e.title, e.details)
+        except Exception as e:
+            result = (False, "Erro na Verificação", f"Não foi possível verificar o arquivo: {e}")
+        self.root.after(0, self._publish_report, patcher.instrumentation)
+        self.root.after(0, self._process_verify_result, *result)
 
-            result_details = (f"Tradução instalada com sucesso!\n\n"
-                              f"{result_details_backup_line}"
-                              f"▪ Arquivo com tradução ativa: \"{PCK_FILENAME}\"")
-            self.root.after(0, self._process_patch_result, True, "Instalação Concluída!", result_details)
+    def _process_verify_result(self, success, title, details):
+        self.progress_bar['value'] = 100
+        self._hide_progress_bar()
+        self._flush_log()
+        self.browse_button.config(state=tk.NORMAL)
+        self.path_entry.config(state=tk.NORMAL)
+        self.verify_button.config(state=tk.NORMAL)
+        self._update_restore_button()
+        if self._is_ready_to_patch() and self.patch_applied_to_path != self.last_validated_path:
+            self.apply_button.config(state=tk.NORMAL)
+        if success:
+            messagebox.showinfo(title, details)
+        else:
+            messagebox.showerror(title, details)
 
+    def _execute_patch(self):
+        patcher = TranslationPatcher(self.game_pck_filepath, self.selected_translation_assets,
+                                     keep_backup=self.keep_backup_var.get(), pck_explorer_path=self.pck_explorer_path,
+                                     log=self.log, progress=self._on_progress,
+                                     instrumentation=self._new_instrumentation())
+        try:
+            title, details = patcher.run()
+            result = (True, title, details)
+        except PatchError as e:
+            result = (False, e.title, e.details)
         except Exception as e:
-            details = (f"A tradução foi processada, mas houve algum problema ao finalizar os arquivos:\n{e}\n\n"
-                       f"Por gentileza, ajuste manualmente:\n"
-                       f"▪ Renomeie \"{temp_pck_file}\" para \"{PCK_FILENAME}\" na pasta do jogo.")
-            self.root.after(0, self._process_patch_result, False, "Erro na Finalização", details)
+            result = (False, "Erro Inesperado", f"Aconteceu algum erro durante a aplicação: {e}")
+        self.root.after(0, self._publish_report, patcher.instrumentation)
+        self.root.after(0, self._process_patch_result, *result)
+
+    def _new_instrumentation(self):
+        instrumentation = Instrumentation(profile=bool(os.environ.get(PROFILE_ENV)))
+        if self._last_validation_seconds is not None:
+            instrumentation.record("validation", self._last_validation_seconds)
+        return instrumentation
+
+    def _publish_report(self, instrumentation):
+        # Tempos no log, relatório completo no arquivo de log, no painel "Detalhes" e em JSON no cache.
+        self.last_report = instrumentation
+        summary = instrumentation.summary()
+        if summary:
+            self.log(f"Tempos: {summary}.")
+        details = instrumentation.describe()
+        self.log_sink.trace(f"Relatório da operação:\n{details}")
+        try:
+            user_cache_dir().mkdir(parents=True, exist_ok=True)
+            instrumentation.save(user_cache_dir() / INSTALL_REPORT_FILENAME)
+        except OSError:
+            pass
+
+        self.details_text.config(state=tk.NORMAL)
+        self.details_text.delete("1.0", tk.END)
+        self.details_text.insert(tk.END, details)
+        self.details_text.config(state=tk.DISABLED)
+        self.details_button.config(state=tk.NORMAL)
+        self.save_report_button.config(state=tk.NORMAL)
+
+    def toggle_details(self):
+        if self._details_visible:
+            self.details_frame.pack_forget()
+            self.details_button.config(text="Detalhes ▸")
+        else:
+            self.details_frame.pack(fill=tk.BOTH, expand=True, pady=5, after=self.details_bar)
+            self.details_button.config(text="Detalhes ▾")
+        self._details_visible = not self._details_visible
+
+    def save_report(self):
+        if self.last_report is None:
+            return
+        path = filedialog.asksaveasfilename(title="Salvar relatório", defaultextension=".json",
+                                            initialfile=INSTALL_REPORT_FILENAME, filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            self.last_report.save(path)
+            self.log(f"Relatório salvo em \"{path}\".")
+        except OSError as e:
+            self.log(f"ERRO ao salvar o relatório: {e}", error=True)
 
     def _process_patch_result(self, success, title, details):
         self.progress_bar['value'] = 100
-        self.root.update_idletasks()
         self._hide_progress_bar()
 
         if success:
             self.patch_applied_to_path = self.last_validated_path
             self.log("Processo concluído com êxito. Parabéns!\n")
+            self._flush_log()
+            self._update_restore_button()
+            self.verify_button.config(state=tk.NORMAL)
             messagebox.showinfo(title, details)
         else:
             self.log(f"ERRO: {title} - {details.splitlines()[0]}", error=True)
+            self._flush_log()
             messagebox.showerror(title, details)
             self.browse_button.config(state=tk.NORMAL)
             self.path_entry.config(state=tk.NORMAL)
+            self.verify_button.config(state=tk.NORMAL)
+            if self._is_ready_to_patch():
+                self.apply_button.config(state=tk.NORMAL)
+
+    def _process_restore_result(self, success, title, details):
+        self.progress_bar['value'] = 100
+        self._hide_progress_bar()
+
+        self.browse_button.config(state=tk.NORMAL)
+        self.path_entry.config(state=tk.NORMAL)
+        if success:
+            self.log("Arquivo original restaurado.\n")
+            self._flush_log()
+            messagebox.showinfo(title, details)
+            self.patch_applied_to_path = None
+            self.last_validated_path = None
+            self._request_validation(0)
+        else:
+            self.log(f"ERRO: {title} - {details.splitlines()[0]}", error=True)
+            self._flush_log()
+            messagebox.showerror(title, details)
+            self._update_restore_button()
+            self.verify_button.config(state=tk.NORMAL)
             if self._is_ready_to_patch():
-                self.apply_button.config(state=tk.NORMAL)
\ No newline at end of file
+                self.apply_button.config(state=tk.NORMAL)
@@ -0,0 +1,230 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from progress import format_duration
+
+PROFILE_TOP_FUNCTIONS = 30
+PHASE_LABELS = {
+    "validation": "validação",
+    "delta": "comparação",
+    "backup": "cópia de segurança",
+    "packing": "gravação",
+    "extract": "extração do pacote",
+    "finalize": "finalização",
+    "verify": "verificação",
+}
+
+
+def process_io():
+    # Bytes lidos e gravados pelo processo até agora, ou None se o sistema não informar.
+    if os.name == 'nt':
+        import ctypes
+
+        class IO_COUNTERS(ctypes.Structure):
+            _fields_ = [(name, ctypes.c_ulonglong) for name in (
+                "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+                "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+
+        counters = IO_COUNTERS()
+        kernel32 = ctypes.windll.kernel32
+        if not kernel32.GetProcessIoCounters(kernel32.GetCurrentProcess(), ctypes.byref(counters)):
+            return None
+        return counters.ReadTransferCount, counters.WriteTransferCount
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def peak_rss(children=False):
+    # Com children=True, o maior pico entre os processos filhos já encerrados (não disponível no Windows).
+    if os.name == 'nt':
+        if children:
+            return None
+        import ctypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        try:
+            ok = ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                          ctypes.byref(counters), counters.cb)
+        except (AttributeError, OSError):
+            return None
+        return counters.PeakWorkingSetSize if ok else None
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+
+class Span:
+    __slots__ = ("name", "start", "seconds", "attrs", "children", "_io_start")
+
+    def __init__(self, name, start, attrs):
+        self.name = name
+        self.start = start
+        self.seconds = None
+        self.attrs = attrs
+        self.children = []
+        self._io_start = None
+
+    def update(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self, origin):
+        return {
+            "name": self.name,
+            "start": round(self.start - origin, 4),
+            "seconds": round(self.seconds, 4) if self.seconds is not None else None,
+            **self.attrs,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+class Instrumentation:
+    # Fases da instalação com duração, volume de dados e memória; os spans aninham por thread.
+    # Com profile=True, o cProfile acompanha a thread que executa profiled().
+    def __init__(self, profile=False):
+        self.started_at = time.time()
+        self.profile = profile
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profile_rows = None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, **attrs):
+        span = Span(name, time.perf_counter(), attrs)
+        stack = self._stack()
+        with self._lock:
+            (stack[-1].children if stack else self.spans).append(span)
+        stack.append(span)
+        span._io_start = process_io()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - span.start
+            io_end = process_io()
+            if span._io_start and io_end:
+                span.attrs["io_read"] = io_end[0] - span._io_start[0]
+                span.attrs["io_written"] = io_end[1] - span._io_start[1]
+            span.attrs["peak_rss"] = peak_rss()
+            stack.pop()
+
+    def record(self, name, seconds, **attrs):
+        # Fase medida fora deste relatório (por exemplo, a validação feita antes de clicar em "Aplicar").
+        span = Span(name, self._origin, attrs)
+        span.seconds = seconds
+        with self._lock:
+            self.spans.insert(0, span)
+        return span
+
+    @contextmanager
+    def profiled(self):
+        if not self.profile:
+            yield
+            return
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._profile_rows = self._summarize_profile(profiler)
+
+    @staticmethod
+    def _summarize_profile(profiler):
+        import pstats
+        stats = pstats.Stats(profiler)
+        rows = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({"function": f"{os.path.basename(filename)}:{line}({function})", "calls": calls,
+                         "total": round(total, 4), "cumulative": round(cumulative, 4)})
+        rows.sort(key=lambda row: row["cumulative"], reverse=True)
+        return rows[:PROFILE_TOP_FUNCTIONS]
+
+    def phase_seconds(self):
+        totals = {}
+        for span in self.spans:
+            if span.seconds is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.seconds
+        return totals
+
+    def summary(self):
+        return ", ".join(f"{PHASE_LABELS.get(name, name)} {format_duration(seconds)}"
+                         for name, seconds in self.phase_seconds().items())
+
+    def to_dict(self):
+        report = {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started_at)),
+            "seconds": round(time.perf_counter() - self._origin, 4),
+            "peak_rss": peak_rss(),
+            "spans": [span.to_dict(self._origin) for span in self.spans],
+        }
+        if self._profile_rows is not None:
+            report["profile"] = self._profile_rows
+        return report
+
+    def describe(self):
+        lines = []
+
+        def add(span, depth):
+            parts = [f"{'  ' * depth}{PHASE_LABELS.get(span.name, span.name)}: "
+                     f"{format_duration(span.seconds) if span.seconds is not None else 'em andamento'}"]
+            if span.attrs.get("files") is not None:
+                parts.append(f"{span.attrs['files']} arquivos")
+            if span.attrs.get("bytes") is not None:
+                parts.append(_format_bytes(span.attrs["bytes"]))
+            if span.attrs.get("io_read") is not None:
+                parts.append(f"E/S {_format_bytes(span.attrs['io_read'])} lidos / "
+                             f"{_format_bytes(span.attrs['io_written'])} gravados")
+            if span.attrs.get("method"):
+                parts.append(span.attrs["method"])
+            lines.append(" — ".join(parts))
+            for child in span.children:
+                add(child, depth + 1)
+
+        for span in self.spans:
+            add(span, 0)
+        rss = peak_rss()
+        if rss:
+            lines.append(f"Pico de memória: {_format_bytes(rss)}")
+        if self._profile_rows:
+            lines.append("\nFunções mais demoradas (tempo acumulado):")
+            lines.extend(f"  {row['cumulative']:.3f} s  {row['calls']:>7}x  {row['function']}"
+                         for row in self._profile_rows[:10])
+        return "\n".join(lines)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,161 @@
+import json
+import os
+import struct
+from pathlib import Path
+
+from backup import DeltaBackup
+from constants import PATCH_JOURNAL_EXT
+from pck import DIRECTORY_OFFSET, PCKError, write_patch_marker
+
+JOURNAL_MAGIC = b"UTPCKJNL"
+JOURNAL_FORMAT_VERSION = 1
+JOURNAL_CHECKPOINT_BYTES = 8 * 1024 * 1024
+_U32 = struct.Struct("<I")
+
+
+def journal_path(pck_path):
+    pck_path = Path(pck_path)
+    return pck_path.with_name(pck_path.name + PATCH_JOURNAL_EXT)
+
+
+class PatchJournal:
+    # Diário da gravação nativa. Fase "data": os dados vão sendo anexados e o diretório original
+    # continua válido; os itens gravados até o último checkpoint podem ser reaproveitados.
+    # Fase "directory": o diretório novo (redo) e os bytes originais (undo) estão salvos, então uma
+    # gravação interrompida do diretório pode ser refeita ou desfeita.
+    # Fase "finalize": o GodotPCKExplorer terminou e falta só mover o arquivo temporário.
+    def __init__(self, path, phase="data", undo=None, write_start=0, write_pos=0, items=None, redo=b"",
+                 temp_path=None, keep_backup=False):
+        self.path = Path(path)
+        self.phase = phase
+        self.undo = undo
+        self.write_start = write_start
+        self.write_pos = write_pos
+        self.items = items or []
+        self.redo = redo
+        self.temp_path = temp_path
+        self.keep_backup = keep_backup
+        self._unsaved_bytes = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC:
+                raise PCKError(f"\"{Path(path).name}\" não é um diário de instalação válido.")
+            meta_len, = _U32.unpack(f.read(4))
+            meta = json.loads(f.read(meta_len).decode("utf-8"))
+            if meta.get("version") != JOURNAL_FORMAT_VERSION:
+                raise PCKError(f"Versão de diário de instalação não suportada: {meta.get('version')}.")
+            undo = None
+            if meta.get("undo"):
+                regions = [(offset, f.read(length)) for offset, length in meta["undo"]["regions"]]
+                undo = DeltaBackup(meta["undo"]["original_size"], meta["undo"]["tail_sha256"], regions)
+            redo = f.read(meta.get("redo_size", 0))
+        if undo is not None and undo.digest() != meta["undo"]["sha256"]:
+            raise PCKError(f"O diário de instalação \"{Path(path).name}\" está corrompido.")
+        items = [(key, offset, size, bytes.fromhex(md5)) for key, offset, size, md5 in meta.get("items", [])]
+        return cls(path, meta["phase"], undo, meta.get("write_start", 0), meta.get("write_pos", 0), items, redo,
+                   meta.get("temp_path"), meta.get("keep_backup", False))
+
+    def save(self):
+        meta = {
+            "version": JOURNAL_FORMAT_VERSION,
+            "phase": self.phase,
+            "write_start": self.write_start,
+            "write_pos": self.write_pos,
+            "items": [[key, offset, size, md5.hex()] for key, offset, size, md5 in self.items],
+            "redo_size": len(self.redo),
+            "temp_path": self.temp_path,
+            "keep_backup": self.keep_backup,
+        }
+        if self.undo is not None:
+            meta["undo"] = {
+                "original_size": self.undo.original_size,
+                "tail_sha256": self.undo.tail_sha256,
+                "regions": [[offset, len(data)] for offset, data in self.undo.regions],
+                "sha256": self.undo.digest(),
+            }
+        meta = json.dumps(meta).encode("utf-8")
+        tmp_path = Path(str(self.path) + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(JOURNAL_MAGIC + _U32.pack(len(meta)) + meta)
+            if self.undo is not None:
+                for _, data in self.undo.regions:
+                    f.write(data)
+            f.write(self.redo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        if self.path.exists():
+            self.path.unlink()
+
+    @property
+    def original_size(self):
+        return self.undo.original_size
+
+    # --- Usado por pck.patch_pck ---
+
+    def open(self, f):
+        # Devolve o tamanho original do PCK. Um diário de outra versão do arquivo é descartado.
+        if self.phase == "data" and self.undo is not None and self.undo.matches(f):
+            return self.undo.original_size
+        self.undo = DeltaBackup.create(f)
+        self.items = []
+        return self.undo.original_size
+
+    def completed(self, f, write_start):
+        # Itens já gravados numa execução anterior com o mesmo ponto de partida; o resto é descartado.
+        file_size = f.seek(0, os.SEEK_END)
+        if write_start != self.write_start or not self.items or file_size < self.write_pos:
+            self.items = []
+            self.write_pos = write_start
+        self.write_start = write_start
+        f.truncate(max(self.write_pos, self.original_size))
+        self.save()
+        return list(self.items)
+
+    def discard_from(self, f, index, write_pos):
+        del self.items[index:]
+        self.write_pos = write_pos
+        f.truncate(max(write_pos, self.original_size))
+
+    def record(self, f, key, offset, size, md5, write_pos):
+        self.items.append((key, offset, size, md5))
+        self._unsaved_bytes += write_pos - self.write_pos
+        self.write_pos = write_pos
+        if self._unsaved_bytes >= JOURNAL_CHECKPOINT_BYTES:
+            self.checkpoint(f)
+
+    def checkpoint(self, f):
+        f.flush()
+        os.fsync(f.fileno())
+        self.save()
+        self._unsaved_bytes = 0
+
+    def begin_directory(self, f, region_end, directory):
+        self.undo.capture(f, [(0, region_end)])
+        self.redo = directory
+        self.phase = "directory"
+        self.checkpoint(f)
+
+
+def begin_finalize(pck_path, temp_path, keep_backup):
+    journal = PatchJournal(journal_path(pck_path), "finalize", temp_path=str(temp_path), keep_backup=keep_backup)
+    journal.save()
+    return journal
+
+
+def roll_forward_directory(pck_path, journal):
+    with open(pck_path, "r+b") as f:
+        write_patch_marker(f)
+        f.seek(DIRECTORY_OFFSET)
+        f.write(journal.redo)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def roll_back_directory(pck_path, journal):
+    with open(pck_path, "r+b") as f:
+        journal.undo.restore(f)
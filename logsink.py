@@ -0,0 +1,61 @@
+import logging
+import queue
+from logging.handlers import RotatingFileHandler
+
+LOG_MAX_LINES = 2000  # linhas mantidas na área de mensagens
+LOG_FILE_MAX_BYTES = 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 3
+
+
+class LogRecord:
+    __slots__ = ("message", "error", "popup_title")
+
+    def __init__(self, message, error=False, popup_title=None):
+        self.message = message
+        self.error = error
+        self.popup_title = popup_title
+
+
+class LogSink:
+    # Qualquer thread pode chamar push(); só a thread da interface chama drain().
+    def __init__(self, log_file=None):
+        self._queue = queue.SimpleQueue()
+        self._logger = None
+        if log_file:
+            self._logger = _open_file_logger(log_file)
+
+    def push(self, message, error=False, popup_title=None):
+        self._queue.put(LogRecord(message, error, popup_title))
+        if self._logger:
+            self._logger.log(logging.ERROR if error else logging.INFO, message)
+
+    def trace(self, message):
+        # Mensagens de diagnóstico: vão só para o arquivo de log, não para a interface.
+        if self._logger:
+            self._logger.debug(message)
+
+    def drain(self, limit=None):
+        records = []
+        while limit is None or len(records) < limit:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+
+def _open_file_logger(log_file):
+    logger = logging.getLogger(f"untilthen.{log_file}")
+    if logger.handlers:
+        return logger
+    try:
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUP_COUNT,
+                                      encoding="utf-8")
+    except OSError:
+        return None
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger
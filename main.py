@@ -1,8 +1,11 @@
+import time
+
+STARTED_AT = time.perf_counter()
+
 import tkinter as tk
 from tkinter import messagebox
 import os
 import sys
-import subprocess
 import ctypes
 
 from etc import is_admin
@@ -23,8 +26,12 @@ def main():
         sys.exit(0) 
 
     root = tk.Tk()
-    app = TranslationSetup(root)
+    app = TranslationSetup(root, started_at=STARTED_AT)
     root.mainloop()
 
 if __name__ == "__main__":
+    # A verificação de PCKs criptografados usa processos auxiliares, inclusive no executável.
+    # Importado só aqui para não pesar na abertura da interface.
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
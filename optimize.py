@@ -0,0 +1,128 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from constants import BASE_TRANSLATION_PATH, DEMO_TRANSLATION_SUBDIR, FULL_TRANSLATION_SUBDIR, MAIN_SUBDIR_NAME
+
+UTF8_BOM = b"\xef\xbb\xbf"
+
+
+class OptimizeError(Exception):
+    pass
+
+
+class MinifyResult:
+    __slots__ = ("path", "data", "size_before", "size_after", "parse_before", "parse_after")
+
+    def __init__(self, path, data, size_before, parse_before, parse_after):
+        self.path = path
+        self.data = data
+        self.size_before = size_before
+        self.size_after = len(data)
+        self.parse_before = parse_before
+        self.parse_after = parse_after
+
+    def describe(self):
+        return _describe(self.size_before, self.size_after, self.parse_before, self.parse_after)
+
+
+def _describe(size_before, size_after, parse_before, parse_after):
+    saved = 1 - size_after / size_before if size_before else 0.0
+    return (f"{size_before / 1024:8.1f} KB -> {size_after / 1024:8.1f} KB ({saved:4.0%})   "
+            f"leitura {parse_before * 1000:6.1f} ms -> {parse_after * 1000:6.1f} ms")
+
+
+def translation_json_files(source_dir):
+    # Só as pastas assets/ das variantes vão para o jogo; outros JSON da pasta da tradução ficam de fora.
+    paths = []
+    for sub_dir in (DEMO_TRANSLATION_SUBDIR, FULL_TRANSLATION_SUBDIR):
+        paths.extend(Path(source_dir, sub_dir, MAIN_SUBDIR_NAME).rglob("*.json"))
+    return sorted(paths)
+
+
+def minify_json(raw):
+    bom = raw.startswith(UTF8_BOM)
+    text = raw[len(UTF8_BOM):].decode("utf-8") if bom else raw.decode("utf-8")
+
+    # Um JSON inválido interrompe a compactação: o arquivo precisa ser corrigido na tradução.
+    start = time.perf_counter()
+    value = json.loads(text)
+    parse_before = time.perf_counter() - start
+
+    compact = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    start = time.perf_counter()
+    json.loads(compact)
+    parse_after = time.perf_counter() - start
+
+    # O BOM é mantido: o arquivo original o tinha e o jogo já lê assim.
+    data = (UTF8_BOM if bom else b"") + compact.encode("utf-8")
+    return data, parse_before, parse_after
+
+
+def _minify_file(path):
+    raw = Path(path).read_bytes()
+    try:
+        data, parse_before, parse_after = minify_json(raw)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return path, str(e)
+    return MinifyResult(path, data, len(raw), parse_before, parse_after), None
+
+
+def minify_json_files(paths, workers=None):
+    # O pool de processos só é usado aqui, por "python -m optimize" e "python -m bundle build".
+    from concurrent.futures import ProcessPoolExecutor
+    paths = [str(p) for p in paths]
+    results = {}
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result, error in executor.map(_minify_file, paths, chunksize=4):
+            if error is not None:
+                errors.append(f"{result}: {error}")
+            else:
+                results[result.path] = result
+    if errors:
+        raise OptimizeError("JSON inválido:\n" + "\n".join(errors))
+    return results
+
+
+def print_report(results, root=None, file=sys.stdout):
+    size_before = size_after = parse_before = parse_after = 0
+    for path in sorted(results):
+        result = results[path]
+        name = Path(path).relative_to(root).as_posix() if root else path
+        print(f"{name:<60} {result.describe()}", file=file)
+        size_before += result.size_before
+        size_after += result.size_after
+        parse_before += result.parse_before
+        parse_after += result.parse_after
+    if results:
+        print(f"{f'Total ({len(results)} arquivos)':<60} "
+              f"{_describe(size_before, size_after, parse_before, parse_after)}", file=file)
+
+
+def main(argv=None):
+    application_path = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(prog="python -m optimize",
+                                     description="Valida e compacta os arquivos JSON da tradução.")
+    parser.add_argument("--source", type=Path, default=application_path / BASE_TRANSLATION_PATH)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--write", action="store_true", help="regrava os arquivos compactados no lugar")
+    args = parser.parse_args(argv)
+
+    paths = translation_json_files(args.source)
+    try:
+        results = minify_json_files(paths, args.workers)
+    except OptimizeError as e:
+        print(f"ERRO: {e}", file=sys.stderr)
+        return 1
+    print_report(results, args.source)
+    if args.write:
+        for path, result in results.items():
+            Path(path).write_bytes(result.data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
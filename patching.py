@@ -0,0 +1,434 @@
+import os
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+
+from backup import BackupError, delta_backup_path, restore_delta_backup, update_delta_backup
+from bundle import BundleError, BundleVariant, TranslationBundle
+from constants import *
+from delta import compute_delta
+from fileops import InsufficientSpaceError, ensure_free_space, keep_copy, replace_file
+from fingerprint import identify_build, variant_by_size
+from instrumentation import Instrumentation
+from journal import PatchJournal, begin_finalize, journal_path, roll_back_directory, roll_forward_directory
+from pck import AssetsError, PCKError, collect_assets, patch_pck
+from progress import ProgressTracker, format_duration, parse_percent
+from verify import VERIFY_CHUNK_SIZE, verify_pck
+
+
+class ValidationError(Exception):
+    def __init__(self, message, show_popup=False):
+        super().__init__(message)
+        self.show_popup = show_popup
+
+
+class PatchError(Exception):
+    def __init__(self, title, details):
+        super().__init__(details)
+        self.title = title
+        self.details = details
+
+
+def _no_log(message, error=False, **kwargs):
+    pass
+
+
+def find_pck_explorer(application_path):
+    candidate = Path(application_path) / GODOT_PCK_EXPLORER
+    if candidate.is_file():
+        return str(candidate)
+    if not getattr(sys, 'frozen', False):
+        import shutil
+        if shutil.which(GODOT_PCK_EXPLORER):
+            return GODOT_PCK_EXPLORER
+    return None
+
+
+def check_pck_explorer(pck_explorer_path, application_path):
+    pck_explorer_dir = Path(pck_explorer_path).parent if pck_explorer_path else Path(application_path)
+    if not pck_explorer_path or not os.access(pck_explorer_path, os.X_OK):
+        raise ValidationError(f"\"{GODOT_PCK_EXPLORER}\" não foi encontrado ou não é executável.")
+    if not (pck_explorer_dir / MBEDTLS_FOLDER_NAME).is_dir():
+        raise ValidationError(
+            f"Pasta \"{MBEDTLS_FOLDER_NAME}\" não encontrada. Ela é uma dependência de {GODOT_PCK_EXPLORER}.")
+
+
+def check_pck_file(game_folder):
+    pck_candidate = Path(game_folder) / PCK_FILENAME
+    if not pck_candidate.is_file():
+        raise ValidationError(f"ERRO: Arquivo \"{PCK_FILENAME}\" não encontrado em \"{game_folder}\".")
+    return str(pck_candidate)
+
+
+def detect_game_variant(pck_path, log=_no_log):
+    try:
+        build = identify_build(pck_path)
+    except PCKError:
+        build = None
+    except Exception as e:
+        raise ValidationError(f"ERRO inesperado ao ler o arquivo PCK: {e}", show_popup=True)
+
+    if build:
+        if build.known:
+            log(f"Build do jogo: {build.label}.")
+        elif build.outdated_translation_risk:
+            log(f"AVISO: Build do jogo não reconhecida ({build.build_id}). "
+                f"A tradução pode não corresponder a esta versão do jogo.", error=True)
+        if build.variant_mismatch:
+            log(f"AVISO: Pelo tamanho, \"{PCK_FILENAME}\" é da versão {build.size_variant}, mas o conteúdo "
+                f"parece da versão {build.detected_variant}. Será usada a tradução da versão {build.variant}.",
+                error=True)
+        return build.variant, build
+
+    try:
+        return variant_by_size(Path(pck_path).stat().st_size), None
+    except Exception as e:
+        raise ValidationError(f"ERRO inesperado ao ler o arquivo PCK: {e}", show_popup=True)
+
+
+def find_translations(application_path):
+    # O pacote gerado por "python -m bundle build" tem preferência sobre a pasta.
+    bundle_path = Path(application_path) / TRANSLATION_BUNDLE_FILENAME
+    if bundle_path.is_file():
+        return bundle_path
+    return Path(application_path) / BASE_TRANSLATION_PATH
+
+
+def translation_assets(translations_path, variant):
+    if Path(translations_path).is_file():
+        return BundleVariant(translations_path, variant)
+    sub_dir = DEMO_TRANSLATION_SUBDIR if variant == "Demo" else FULL_TRANSLATION_SUBDIR
+    return str(Path(translations_path) / sub_dir / MAIN_SUBDIR_NAME)
+
+
+def check_translation_assets(assets):
+    # Conferido antes de aplicar: uma tradução ausente não pode terminar como "nada a atualizar".
+    if isinstance(assets, BundleVariant):
+        try:
+            with TranslationBundle(assets.bundle_path) as bundle:
+                if not bundle.assets(assets.variant):
+                    raise BundleError(f"O pacote de tradução não tem arquivos da versão \"{assets.variant}\".")
+        except BundleError as e:
+            raise ValidationError(f"ERRO: {e}")
+    elif not Path(assets).is_dir() or not any(Path(assets).iterdir()):
+        raise ValidationError(f"ERRO: Arquivos da tradução não encontrados em \"{assets}\".")
+    return assets
+
+
+def _split_pck_filename():
+    p = Path(PCK_FILENAME)
+    return p.stem, p.suffix
+
+
+def temp_pck_path(pck_path):
+    base, ext = _split_pck_filename()
+    return str(Path(pck_path).parent / f"{base}_Translated_PTBR_TEMP{ext}")
+
+
+def legacy_backup_path(pck_path):
+    base, ext = _split_pck_filename()
+    return str(Path(pck_path).parent / f"{base}OLD{ext}")
+
+
+def restorable_backup(pck_path):
+    for candidate in (delta_backup_path(pck_path), Path(legacy_backup_path(pck_path))):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def restore_original(pck_path, backup_path):
+    if backup_path.suffix == DELTA_BACKUP_EXT:
+        restore_delta_backup(pck_path, backup_path)
+    else:
+        os.replace(backup_path, pck_path)
+
+
+def finalize_temp_pck(pck_path, temp_pck_file, keep_backup, log=_no_log):
+    # Pode ser repetido após uma interrupção: cada passo verifica o que já foi feito.
+    # O original só é trocado pelo os.replace no fim, então a pasta nunca fica sem "UntilThen.pck".
+    game_pck_path = Path(pck_path)
+    backup_path = Path(legacy_backup_path(pck_path))
+    backup_filename = backup_path.name
+
+    if keep_backup:
+        if not backup_path.exists() and game_pck_path.exists() and Path(temp_pck_file).exists():
+            log(f"Criando cópia do arquivo original como \"{backup_filename}\"...")
+            method = keep_copy(game_pck_path, backup_path)
+            log(f"Cópia \"{backup_filename}\" criada ({method}).")
+            result_details_backup_line = f"▪ Cópia do arquivo original: \"{backup_filename}\"\n"
+        else:
+            result_details_backup_line = f"▪ Cópia anterior preservada: \"{backup_filename}\"\n"
+    else:
+        log(f"Substituindo arquivo original \"{PCK_FILENAME}\"...")
+        result_details_backup_line = "▪ Arquivo original substituído.\n"
+
+    if Path(temp_pck_file).exists():
+        replace_file(temp_pck_file, game_pck_path)
+    return result_details_backup_line
+
+
+def recover_interrupted_patch(game_folder, log=_no_log):
+    pck_path = Path(game_folder) / PCK_FILENAME
+    temp_pck_file = Path(temp_pck_path(pck_path))
+    path = journal_path(pck_path)
+
+    journal = None
+    if path.exists():
+        try:
+            journal = PatchJournal.load(path)
+        except (OSError, ValueError, KeyError, PCKError) as e:
+            log(f"AVISO: Diário de instalação ilegível descartado ({e}).", error=True)
+            path.unlink()
+
+    if journal is None:
+        # Sem diário, o temporário é de uma execução do GodotPCKExplorer que não chegou ao fim.
+        if temp_pck_file.exists() and pck_path.exists():
+            temp_pck_file.unlink()
+            log("Arquivo temporário de uma instalação interrompida removido.")
+        return
+
+    if not pck_path.exists() and journal.phase != "finalize":
+        journal.delete()
+    elif journal.phase == "data":
+        with open(pck_path, "rb") as f:
+            resumable = journal.undo is not None and journal.undo.matches(f)
+        if resumable:
+            log("Instalação interrompida encontrada: ela continuará de onde parou ao clicar em \"Aplicar\".")
+        else:
+            journal.delete()
+    elif journal.phase == "directory":
+        if pck_path.stat().st_size >= journal.write_pos:
+            roll_forward_directory(pck_path, journal)
+            log(f"Instalação interrompida concluída: índice de \"{PCK_FILENAME}\" regravado.")
+        else:
+            roll_back_directory(pck_path, journal)
+            log(f"Instalação interrompida desfeita: \"{PCK_FILENAME}\" voltou ao original.")
+        journal.delete()
+    elif journal.phase == "finalize":
+        if Path(journal.temp_path).exists():
+            finalize_temp_pck(pck_path, journal.temp_path, journal.keep_backup, log)
+            log(f"Instalação interrompida concluída: \"{PCK_FILENAME}\" traduzido instalado.")
+        journal.delete()
+
+
+class TranslationPatcher:
+    def __init__(self, pck_path, assets_dir, keep_backup=False, pck_explorer_path=None, log=None, progress=None,
+                 instrumentation=None):
+        self.pck_path = pck_path
+        self.assets_dir = assets_dir
+        self.keep_backup = keep_backup
+        self.pck_explorer_path = pck_explorer_path
+        self.log = log or _no_log
+        self.progress = progress
+        self.instrumentation = instrumentation or Instrumentation()
+        self.stats = {}
+
+    def run(self):
+        with self.instrumentation.profiled():
+            return self._run()
+
+    def _run(self):
+        try:
+            try:
+                result = self._run_native()
+            except PCKError as e:
+                if not self.pck_explorer_path:
+                    raise PatchError("Erro na Aplicação", f"{e}\n\n\"{GODOT_PCK_EXPLORER}\" não está disponível.")
+                self.log(f"Aviso: {e} Aplicando com \"{GODOT_PCK_EXPLORER}\"...")
+                result = self._run_explorer()
+
+            if self.stats.get("status") == "patched":
+                report = self.verify()
+                if not report.ok:
+                    details = (f"A tradução foi gravada, mas \"{PCK_FILENAME}\" não contém os arquivos esperados:\n"
+                               f"{report.failure_details()}\n\n"
+                               f"Isso costuma ser causado por antivírus ou disco cheio. Restaure o arquivo original "
+                               f"(ou verifique os arquivos do jogo na Steam) e aplique a tradução novamente.")
+                    raise PatchError("Falha na Verificação", details)
+            return result
+        except (BundleError, AssetsError) as e:
+            raise PatchError("Erro no Pacote da Tradução", str(e))
+        except BackupError as e:
+            raise PatchError("Erro na Cópia de Segurança", str(e))
+        except InsufficientSpaceError as e:
+            raise PatchError("Espaço Insuficiente em Disco",
+                             f"{e}\n\nLibere espaço no disco do jogo e tente novamente. Nenhum arquivo foi alterado.")
+
+    def _translation_assets(self):
+        if isinstance(self.assets_dir, BundleVariant):
+            with TranslationBundle(self.assets_dir.bundle_path) as bundle:
+                return bundle.assets(self.assets_dir.variant)
+        return collect_assets(self.assets_dir)
+
+    def verify(self, workers=None, chunk_size=VERIFY_CHUNK_SIZE):
+        try:
+            with self.instrumentation.span("verify") as span:
+                report = verify_pck(self.pck_path, self._translation_assets(), workers, chunk_size, self.progress)
+                span.update(files=report.checked, bytes=report.bytes_read, failures=len(report.failures))
+        except (BundleError, AssetsError) as e:
+            raise PatchError("Erro no Pacote da Tradução", str(e))
+        self.stats["verify"] = report.to_dict()
+        self.log(f"Verificação: {report.describe()}", error=not report.ok)
+        return report
+
+    def _run_native(self):
+        if isinstance(self.assets_dir, BundleVariant):
+            with TranslationBundle(self.assets_dir.bundle_path) as bundle:
+                return self._patch_native(bundle.assets(self.assets_dir.variant))
+        return self._patch_native(collect_assets(self.assets_dir))
+
+    def _patch_native(self, all_assets):
+        # Sem arquivos, a comparação não acharia nada a atualizar e uma tradução ausente pareceria instalada.
+        if not all_assets:
+            raise AssetsError("Nenhum arquivo da tradução foi encontrado.")
+        span = self.instrumentation.span
+        with span("delta", files=len(all_assets)) as delta_span:
+            assets = compute_delta(self.pck_path, all_assets, progress=self.progress)
+            delta_span.update(changed=len(assets), bytes=sum(a.size for a in all_assets))
+        self.stats.update(method="native", total=len(all_assets), changed=len(assets), bytes_written=0)
+        if not assets:
+            self.stats["status"] = "up_to_date"
+            self.log("Todos os arquivos da tradução já estão no jogo.")
+            return "Tradução Atualizada", "A tradução já está atualizada. Nenhum arquivo precisou ser alterado."
+        self.log(f"{len(assets)} de {len(all_assets)} arquivos da tradução precisam ser atualizados.")
+        # Os dados novos vão para o fim do PCK; a margem cobre diretório, realocações e a cópia de segurança.
+        ensure_free_space(Path(self.pck_path).parent, sum(a.size for a in assets) + FREE_SPACE_MARGIN)
+
+        before_write = None
+        if self.keep_backup:
+            backup_path = delta_backup_path(self.pck_path)
+            if backup_path.exists():
+                result_details_backup_line = f"▪ Cópia anterior preservada: \"{backup_path.name}\"\n"
+            else:
+                result_details_backup_line = f"▪ Cópia do arquivo original: \"{backup_path.name}\"\n"
+
+            def before_write(f, ranges, original_size):
+                with span("backup") as backup_span:
+                    backup = update_delta_backup(backup_path, f, ranges, original_size)
+                    backup_span.update(bytes=backup.size)
+                self.log(f"Cópia de segurança \"{backup_path.name}\" atualizada ({backup.size / 1024:.0f} KB).")
+        else:
+            result_details_backup_line = "▪ Arquivo original atualizado.\n"
+
+        path = journal_path(self.pck_path)
+        journal = PatchJournal.load(path) if path.exists() else PatchJournal(path)
+        with span("packing", method="native") as packing_span:
+            stats = patch_pck(self.pck_path, assets, before_write, self.progress, journal)
+            packing_span.update(files=len(assets), bytes=stats['bytes_written'], added=stats['added'],
+                                relocated=stats['relocated'], resumed=stats['resumed'])
+        self.stats.update(status="patched", bytes_written=stats['bytes_written'])
+        if stats['resumed']:
+            self.log(f"Instalação retomada: {stats['resumed']} arquivos já gravados foram aproveitados.")
+        written_mb = stats['bytes_written'] / (1024 * 1024)
+        written_files = max(0, stats['replaced'] + stats['added'] - stats['resumed'])
+        self.log(f"{written_files} arquivos gravados ({written_mb:.1f} MB) "
+                 f"em \"{PCK_FILENAME}\" em {format_duration(stats['elapsed'])} "
+                 f"({written_mb / max(stats['elapsed'], 1e-6):.1f} MB/s).")
+
+        result_details = (f"Tradução instalada com sucesso!\n\n"
+                          f"{result_details_backup_line}"
+                          f"▪ Arquivo com tradução ativa: \"{PCK_FILENAME}\"")
+        return "Instalação Concluída!", result_details
+
+    def _run_explorer(self):
+        if not isinstance(self.assets_dir, BundleVariant):
+            return self._run_explorer_on(self.assets_dir)
+        # O explorer só lê pastas: extrai a variante do pacote para uma pasta temporária.
+        import tempfile
+        with tempfile.TemporaryDirectory(prefix="UntilThenPTBR-") as assets_dir:
+            with self.instrumentation.span("extract"), TranslationBundle(self.assets_dir.bundle_path) as bundle:
+                bundle.extract(self.assets_dir.variant, assets_dir)
+            return self._run_explorer_on(assets_dir)
+
+    def _run_explorer_on(self, assets_dir):
+        # subprocess e shutil só são necessários neste caminho; importá-los aqui mantém a abertura rápida.
+        import subprocess
+        self.stats.update(method="explorer", status="patched")
+        temp_pck_file = temp_pck_path(self.pck_path)
+        # O explorer grava um PCK inteiro novo ao lado do original.
+        assets_size = sum(f.stat().st_size for f in Path(assets_dir).rglob("*") if f.is_file())
+        ensure_free_space(Path(self.pck_path).parent,
+                          Path(self.pck_path).stat().st_size + assets_size + FREE_SPACE_MARGIN)
+        command = [
+            self.pck_explorer_path, "-pc", self.pck_path,
+            assets_dir, temp_pck_file,
+            GODOT_VERSION_STR, PATH_PREFIX_STRING
+        ]
+
+        try:
+            startupinfo = None
+            if os.name == 'nt':
+                startupinfo = subprocess.STARTUPINFO()
+                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+                startupinfo.wShowWindow = subprocess.SW_HIDE
+
+            with self.instrumentation.span("packing", method="explorer") as span:
+                process = subprocess.Popen(
+                    command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                    text=True, startupinfo=startupinfo, encoding='utf-8', errors='replace', bufsize=1
+                )
+                output_tail = self._stream_explorer_output(process, command)
+                span.update(returncode=process.returncode)
+        except subprocess.TimeoutExpired:
+            raise PatchError("Erro de Timeout", "A operação demorou mais de 30 minutos.")
+
+        if process.returncode != 0:
+            if Path(temp_pck_file).exists(): Path(temp_pck_file).unlink()
+            raise PatchError("Erro na Aplicação",
+                             f"\"{Path(self.pck_explorer_path).name}\" falhou (código: {process.returncode}).\n\n"
+                             f"Detalhes:\n{output_tail}")
+
+        self.log("Tradução aplicada com sucesso ao arquivo temporário.")
+        return self._finalize(temp_pck_file)
+
+    def _stream_explorer_output(self, process, command):
+        import subprocess
+        # O explorer não informa o total; o progresso é estimado pelo tamanho do PCK original.
+        tracker = ProgressTracker(self.progress, "Empacotando", Path(self.pck_path).stat().st_size)
+        output_tail = deque(maxlen=20)
+        timed_out = threading.Event()
+
+        def kill_on_timeout():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(PCK_EXPLORER_TIMEOUT, kill_on_timeout)
+        timer.start()
+        try:
+            for line in process.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                output_tail.append(line)
+                percent = parse_percent(line)
+                done = tracker.total * percent / 100 if percent is not None else tracker.done
+                tracker.update(int(done), current=line[:80])
+            process.wait()
+        finally:
+            timer.cancel()
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(command, PCK_EXPLORER_TIMEOUT)
+        return "\n".join(output_tail)
+
+    def _finalize(self, temp_pck_file):
+        try:
+            with self.instrumentation.span("finalize", bytes=Path(temp_pck_file).stat().st_size):
+                journal = begin_finalize(self.pck_path, temp_pck_file, self.keep_backup)
+                result_details_backup_line = finalize_temp_pck(self.pck_path, temp_pck_file, self.keep_backup,
+                                                               self.log)
+                journal.delete()
+            self.log(f"\n\"{PCK_FILENAME}\" traduzido instalado.")
+
+            result_details = (f"Tradução instalada com sucesso!\n\n"
+                              f"{result_details_backup_line}"
+                              f"▪ Arquivo com tradução ativa: \"{PCK_FILENAME}\"")
+            return "Instalação Concluída!", result_details
+
+        except Exception as e:
+            details = (f"A tradução foi processada, mas houve algum problema ao finalizar os arquivos:\n{e}\n\n"
+                       f"Por gentileza, ajuste manualmente:\n"
+                       f"▪ Renomeie \"{temp_pck_file}\" para \"{PCK_FILENAME}\" na pasta do jogo.")
+            raise PatchError("Erro na Finalização", details)
@@ -0,0 +1,498 @@
+import hashlib
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from constants import GODOT_VERSION_STR, PATH_PREFIX_STRING, PCK_KEY_ENV
+from pck_crypto import (CryptoError, decrypt_blob, decrypt_stream, encrypt_blob, encrypt_files, encrypt_stream,
+                        encrypted_size, encryption_key, parallel_encryption)
+from progress import ProgressTracker
+
+PCK_MAGIC = 0x43504447  # "GDPC"
+PCK_FORMAT_VERSION = int(GODOT_VERSION_STR.split(".")[0])
+PACK_DIR_ENCRYPTED = 1 << 0
+PACK_REL_FILEBASE = 1 << 1
+PACK_FILE_ENCRYPTED = 1 << 0
+PCK_PADDING = 16
+RES_PREFIX = "res://"
+
+# magic, versão do formato, major, minor, patch, flags, file_base, 16 x u32 reservados
+_HEADER = struct.Struct("<IIIIIIQ64x")
+_ENTRY_TAIL = struct.Struct("<QQ16sI")
+_U32 = struct.Struct("<I")
+_FLAGS_OFFSET = 20
+# Gravado nos campos reservados do cabeçalho (o Godot os ignora) quando o gravador nativo altera o PCK.
+PATCH_MARKER = b"UTPTBR\x00\x01"
+_PATCH_MARKER_OFFSET = 32
+_BLOB_LENGTH = struct.Struct("<16xQ16x")
+DIRECTORY_OFFSET = _HEADER.size
+COPY_CHUNK_SIZE = 1024 * 1024
+INDEX_MAP_WINDOW = 4 * 1024 * 1024
+
+
+class PCKError(Exception):
+    pass
+
+
+class PCKTruncatedError(PCKError):
+    pass
+
+
+class PCKEncryptionError(PCKError):
+    pass
+
+
+class AssetsError(Exception):
+    pass
+
+
+class PCKHeader:
+    __slots__ = ("version", "ver_major", "ver_minor", "ver_patch", "flags", "file_base")
+
+    def __init__(self, version, ver_major, ver_minor, ver_patch, flags, file_base):
+        self.version = version
+        self.ver_major = ver_major
+        self.ver_minor = ver_minor
+        self.ver_patch = ver_patch
+        self.flags = flags
+        self.file_base = file_base
+
+    @property
+    def godot_version(self):
+        return f"{self.ver_major}.{self.ver_minor}.{self.ver_patch}"
+
+
+class PCKEntry:
+    __slots__ = ("path", "offset", "size", "md5", "flags")
+
+    def __init__(self, path, offset, size, md5, flags=0):
+        self.path = path
+        self.offset = offset
+        self.size = size
+        self.md5 = md5
+        self.flags = flags
+
+    @property
+    def key(self):
+        return normalize_pck_path(self.path)
+
+    @property
+    def encrypted(self):
+        return bool(self.flags & PACK_FILE_ENCRYPTED)
+
+    @property
+    def stored_size(self):
+        return encrypted_size(self.size) if self.encrypted else self.size
+
+
+class AssetFile:
+    __slots__ = ("path", "source", "size", "md5")
+
+    def __init__(self, path, source, size, md5=None):
+        self.path = path
+        self.source = source
+        self.size = size
+        self.md5 = md5
+
+    @property
+    def key(self):
+        return normalize_pck_path(self.path)
+
+    def open(self):
+        return open(self.source, "rb")
+
+
+def normalize_pck_path(path):
+    if path.startswith(RES_PREFIX):
+        path = path[len(RES_PREFIX):]
+    return path.lstrip("/")
+
+
+def align(value, alignment=PCK_PADDING):
+    return value + (-value % alignment)
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise PCKTruncatedError("Arquivo PCK truncado ou corrompido.")
+    return data
+
+
+def parse_header(data):
+    if len(data) < _HEADER.size:
+        raise PCKTruncatedError("Arquivo PCK truncado ou corrompido.")
+    magic, *fields = _HEADER.unpack_from(data, 0)
+    if magic != PCK_MAGIC:
+        raise PCKError("O arquivo não é um PCK do Godot válido.")
+    header = PCKHeader(*fields)
+    if header.version != PCK_FORMAT_VERSION:
+        raise PCKError(f"Versão de PCK não suportada: {header.version} (esperada: {PCK_FORMAT_VERSION}).")
+    return header
+
+
+def require_key():
+    try:
+        key = encryption_key()
+    except CryptoError as e:
+        raise PCKEncryptionError(str(e)) from None
+    if key is None:
+        raise PCKEncryptionError(f"O PCK está criptografado e nenhuma chave foi configurada "
+                                 f"(variável de ambiente {PCK_KEY_ENV}).")
+    return key
+
+
+def check_entry_key(f, file_base, entries, key):
+    # Com o diretório em texto puro, só um arquivo criptografado confirma a chave. Uma chave errada
+    # gravaria arquivos que o jogo não consegue abrir, e a verificação, com a mesma chave, os aprovaria.
+    encrypted = [entry for entry in entries if entry.encrypted and entry.size]
+    if not encrypted:
+        return
+    entry = min(encrypted, key=lambda e: e.size)
+    f.seek(file_base + entry.offset)
+    try:
+        _, stored_md5, md5 = decrypt_stream(f, None, key)
+    except CryptoError as e:
+        raise PCKEncryptionError(f"Não foi possível ler \"{entry.path}\" com a chave configurada: {e}") from None
+    if md5 != stored_md5:
+        raise PCKEncryptionError(f"A chave configurada não corresponde à do PCK "
+                                 f"(\"{entry.path}\" não pôde ser descriptografado).")
+
+
+def _read_asset(asset):
+    with asset.open() as src:
+        return src.read()
+
+
+def _decrypt_directory(blob):
+    try:
+        return decrypt_blob(blob, require_key())
+    except CryptoError as e:
+        raise PCKEncryptionError(f"Não foi possível ler o diretório criptografado do PCK: {e}") from None
+
+
+def serialize_header(header):
+    return _HEADER.pack(PCK_MAGIC, header.version, header.ver_major, header.ver_minor, header.ver_patch,
+                        header.flags, header.file_base)
+
+
+def has_patch_marker(f):
+    f.seek(_PATCH_MARKER_OFFSET)
+    return f.read(len(PATCH_MARKER)) == PATCH_MARKER
+
+
+def write_patch_marker(f):
+    f.seek(_PATCH_MARKER_OFFSET)
+    f.write(PATCH_MARKER)
+
+
+def read_header(f):
+    f.seek(0)
+    return parse_header(_read_exact(f, _HEADER.size))
+
+
+def read_index(f):
+    header = read_header(f)
+    file_count, = _U32.unpack(_read_exact(f, 4))
+    if header.flags & PACK_DIR_ENCRYPTED:
+        blob_header = _read_exact(f, _BLOB_LENGTH.size)
+        length, = _BLOB_LENGTH.unpack(blob_header)
+        blob = blob_header + _read_exact(f, encrypted_size(length) - len(blob_header))
+        buf = _decrypt_directory(blob)
+        entries = [PCKEntry(path, offset, size, md5, flags)
+                   for path, offset, size, md5, flags, _ in _iter_entries(buf, 0, file_count)]
+        return header, entries, f.tell()
+    entries = []
+    for _ in range(file_count):
+        path_len, = _U32.unpack(_read_exact(f, 4))
+        path = _read_exact(f, path_len).rstrip(b"\0").decode("utf-8")
+        offset, size, md5, flags = _ENTRY_TAIL.unpack(_read_exact(f, _ENTRY_TAIL.size))
+        entries.append(PCKEntry(path, offset, size, md5, flags))
+    return header, entries, f.tell()
+
+
+def _iter_entries(buf, pos, file_count):
+    buf_len = len(buf)
+    for _ in range(file_count):
+        if pos + 4 > buf_len:
+            raise PCKTruncatedError("Arquivo PCK truncado ou corrompido.")
+        path_len, = _U32.unpack_from(buf, pos)
+        path_end = pos + 4 + path_len
+        pos = path_end + _ENTRY_TAIL.size
+        if pos > buf_len:
+            raise PCKTruncatedError("Arquivo PCK truncado ou corrompido.")
+        path = bytes(buf[path_end - path_len:path_end]).rstrip(b"\0").decode("utf-8")
+        yield (path, *_ENTRY_TAIL.unpack_from(buf, path_end), pos)
+
+
+def iter_directory(buf):
+    # Gera (caminho, offset, tamanho, md5, flags, fim_da_entrada) direto do buffer.
+    pos = DIRECTORY_OFFSET + 4
+    if pos > len(buf):
+        raise PCKTruncatedError("Arquivo PCK truncado ou corrompido.")
+    file_count, = _U32.unpack_from(buf, DIRECTORY_OFFSET)
+    flags, = _U32.unpack_from(buf, _FLAGS_OFFSET)
+    if not flags & PACK_DIR_ENCRYPTED:
+        yield from _iter_entries(buf, pos, file_count)
+        return
+
+    # Diretório criptografado: a contagem fica em claro, seguida de um único bloco cifrado.
+    if pos + _BLOB_LENGTH.size > len(buf):
+        raise PCKTruncatedError("Arquivo PCK truncado ou corrompido.")
+    dir_end = pos + encrypted_size(_BLOB_LENGTH.unpack_from(buf, pos)[0])
+    if dir_end > len(buf):
+        raise PCKTruncatedError("Arquivo PCK truncado ou corrompido.")
+    plain = _decrypt_directory(buf[pos:dir_end])
+    try:
+        for *entry, _ in _iter_entries(plain, 0, file_count):
+            yield (*entry, dir_end)
+    except PCKTruncatedError:
+        raise PCKError("O diretório criptografado do PCK está corrompido.") from None
+
+
+def parse_index(buf):
+    header = parse_header(buf)
+    entries = []
+    dir_end = DIRECTORY_OFFSET + 4
+    for path, offset, size, md5, flags, dir_end in iter_directory(buf):
+        entries.append(PCKEntry(path, offset, size, md5, flags))
+    return header, entries, dir_end
+
+
+def read_index_mapped(pck_path, window=INDEX_MAP_WINDOW, parser=parse_index):
+    # Mapeia apenas o início do arquivo (cabeçalho + diretório), ampliando a janela se preciso.
+    with open(pck_path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if not file_size:
+            raise PCKTruncatedError("Arquivo PCK vazio.")
+        length = min(window, file_size)
+        while True:
+            with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ) as mm:
+                try:
+                    return parser(mm)
+                except PCKTruncatedError:
+                    if length >= file_size:
+                        raise
+            length = min(length * 4, file_size)
+
+
+def _encode_path(path):
+    encoded = path.encode("utf-8")
+    return encoded + b"\0" * (-len(encoded) % 4)
+
+
+def directory_size(paths, encrypted=False):
+    size = sum(4 + len(_encode_path(p)) + _ENTRY_TAIL.size for p in paths)
+    return 4 + (encrypted_size(size) if encrypted else size)
+
+
+def serialize_directory(entries, key=None):
+    parts = []
+    for entry in entries:
+        encoded = _encode_path(entry.path)
+        parts.append(_U32.pack(len(encoded)))
+        parts.append(encoded)
+        parts.append(_ENTRY_TAIL.pack(entry.offset, entry.size, entry.md5, entry.flags))
+    directory = b"".join(parts)
+    if key is not None:
+        directory = encrypt_blob(directory, key)
+    return _U32.pack(len(entries)) + directory
+
+
+def collect_assets(assets_dir, prefix=PATH_PREFIX_STRING):
+    assets_dir = Path(assets_dir)
+    if not assets_dir.is_dir():
+        raise AssetsError(f"Pasta da tradução \"{assets_dir}\" não encontrada.")
+    assets = []
+    for source in sorted(assets_dir.rglob("*")):
+        if source.is_file():
+            rel_path = source.relative_to(assets_dir).as_posix()
+            assets.append(AssetFile(prefix + rel_path, source, source.stat().st_size))
+    if not assets:
+        raise AssetsError(f"A pasta da tradução \"{assets_dir}\" está vazia.")
+    return assets
+
+
+def _copy_stream(src, dst, size=None):
+    md5 = hashlib.md5()
+    written = 0
+    while size is None or written < size:
+        chunk = src.read(COPY_CHUNK_SIZE if size is None else min(COPY_CHUNK_SIZE, size - written))
+        if not chunk:
+            break
+        md5.update(chunk)
+        dst.write(chunk)
+        written += len(chunk)
+    if size is not None and written != size:
+        raise PCKTruncatedError("Fim inesperado ao copiar os dados do PCK.")
+    return written, md5.digest()
+
+
+def _asset_md5(asset):
+    if asset.md5:
+        return asset.md5
+    md5 = hashlib.md5()
+    with asset.open() as src:
+        while chunk := src.read(COPY_CHUNK_SIZE):
+            md5.update(chunk)
+    return md5.digest()
+
+
+def _resumable_count(items, completed):
+    # Quantos itens do início da sequência já estão gravados com o mesmo conteúdo.
+    count = 0
+    for (key, expected_md5), (done_key, _, _, done_md5) in zip(items, completed):
+        if key != done_key or expected_md5() != done_md5:
+            break
+        count += 1
+    return count
+
+
+def patch_pck(pck_path, assets, before_write=None, progress=None, journal=None, workers=None):
+    with open(pck_path, "r+b") as f:
+        header, entries, old_dir_end = read_index(f)
+        file_base = header.file_base
+        encrypted_dir = bool(header.flags & PACK_DIR_ENCRYPTED)
+        by_key = {entry.key: entry for entry in entries}
+        use_res_prefix = any(entry.path.startswith(RES_PREFIX) for entry in entries)
+
+        replaced = set()
+        new_paths = []
+        for asset in assets:
+            if asset.key in by_key:
+                replaced.add(asset.key)
+            else:
+                new_paths.append(RES_PREFIX + asset.key if use_res_prefix else asset.key)
+
+        # O diretório do formato v2 fica logo após o cabeçalho; se crescer, os dados que ele
+        # sobrescreveria são realocados para o fim do arquivo (criptografados ou não, os bytes são
+        # copiados como estão).
+        new_dir_end = DIRECTORY_OFFSET + directory_size([e.path for e in entries] + new_paths, encrypted_dir)
+        relocated = []
+        if new_dir_end > old_dir_end:
+            for entry in entries:
+                start = file_base + entry.offset
+                if (entry.key not in replaced and entry.size and start < new_dir_end
+                        and start + entry.stored_size > old_dir_end):
+                    relocated.append(entry)
+        # Num PCK criptografado, cada arquivo substituído mantém a criptografia do original e os
+        # novos seguem a do diretório.
+        encrypt = [by_key[a.key].encrypted if a.key in by_key else encrypted_dir for a in assets]
+        key = require_key() if encrypted_dir or any(encrypt) else None
+        if key is not None and not encrypted_dir:
+            # Um diretório criptografado já confirma a chave ao ser lido.
+            check_entry_key(f, file_base, entries, key)
+
+        file_end = f.seek(0, os.SEEK_END)
+        if journal:
+            # Numa execução retomada, o que foi anexado pela anterior não conta como parte do original.
+            file_end = journal.open(f)
+        write_pos = align(max(file_end, new_dir_end))
+        if write_pos < file_base:
+            raise PCKError("Estrutura do PCK não suportada (dados antes do file_base).")
+        if before_write:
+            # Trechos já existentes que serão sobrescritos (cabeçalho e diretório); o restante é apenas anexado.
+            before_write(f, [(0, max(old_dir_end, new_dir_end))], file_end)
+
+        tracker = ProgressTracker(progress, "Gravando", sum(a.size for a in assets) + sum(e.size for e in relocated),
+                                  len(assets) + len(relocated))
+        resumed = 0
+        if journal:
+            completed = journal.completed(f, write_pos)
+            items = ([(e.key, lambda e=e: e.md5) for e in relocated] +
+                     [(a.key, lambda a=a: _asset_md5(a)) for a in assets])
+            resumed = _resumable_count(items, completed)
+            if resumed < len(completed):
+                _, offset, _, _ = completed[resumed]
+                journal.discard_from(f, resumed, file_base + offset)
+            if resumed:
+                write_pos = journal.write_pos
+        if not resumed:
+            f.seek(file_end)
+            f.write(b"\0" * (write_pos - file_end))
+
+        # Os arquivos a criptografar são cifrados em paralelo de antemão e gravados em ordem, como antes.
+        to_encrypt = [a for i, a in enumerate(assets, len(relocated)) if i >= resumed and encrypt[i - len(relocated)]]
+        encrypted_blobs = None
+        if parallel_encryption(len(to_encrypt), workers):
+            encrypted_blobs = encrypt_files(map(_read_asset, to_encrypt), key, workers)
+
+        new_paths_iter = iter(new_paths)
+        bytes_written = 0
+        for i, entry in enumerate(relocated):
+            if i < resumed:
+                _, entry.offset, _, _ = completed[i]
+                tracker.advance(entry.size, current=entry.key)
+                continue
+            f.seek(file_base + entry.offset)
+            data = _read_exact(f, entry.stored_size)
+            f.seek(write_pos)
+            f.write(data + b"\0" * (-len(data) % PCK_PADDING))
+            entry.offset = write_pos - file_base
+            write_pos = f.tell()
+            if journal:
+                journal.record(f, entry.key, entry.offset, entry.size, entry.md5, write_pos)
+            tracker.advance(entry.size, current=entry.key)
+
+        for i, asset in enumerate(assets, len(relocated)):
+            entry = by_key.get(asset.key)
+            if entry is None:
+                entry = PCKEntry(next(new_paths_iter), 0, 0, b"", 0)
+                entries.append(entry)
+                by_key[asset.key] = entry
+            flags = PACK_FILE_ENCRYPTED if encrypt[i - len(relocated)] else 0
+            if i < resumed:
+                _, entry.offset, entry.size, entry.md5 = completed[i]
+                entry.flags = flags
+                tracker.advance(entry.size, current=asset.key)
+                continue
+
+            f.seek(write_pos)
+            if flags and encrypted_blobs:
+                size, md5, blob = next(encrypted_blobs)
+                f.write(blob)
+                stored_size = len(blob)
+            else:
+                with asset.open() as src:
+                    if flags:
+                        size, md5 = encrypt_stream(src, f, key)
+                        stored_size = encrypted_size(size)
+                    else:
+                        size, md5 = _copy_stream(src, f)
+                        stored_size = size
+            f.write(b"\0" * (-stored_size % PCK_PADDING))
+            bytes_written += size
+
+            entry.offset = write_pos - file_base
+            entry.size = size
+            entry.md5 = md5
+            entry.flags = flags
+            write_pos = f.tell()
+            if journal:
+                journal.record(f, asset.key, entry.offset, size, md5, write_pos)
+            tracker.advance(size, current=asset.key)
+
+        directory = serialize_directory(entries, key if encrypted_dir else None)
+        if journal:
+            journal.begin_directory(f, max(old_dir_end, new_dir_end), directory)
+        else:
+            f.flush()
+            os.fsync(f.fileno())
+
+        write_patch_marker(f)
+        f.seek(DIRECTORY_OFFSET)
+        f.write(directory)
+        f.flush()
+        os.fsync(f.fileno())
+        if journal:
+            journal.delete()
+
+    return {
+        "replaced": len(replaced),
+        "added": len(new_paths),
+        "relocated": len(relocated),
+        "bytes_written": bytes_written,
+        "resumed": resumed,
+        "elapsed": tracker.elapsed,
+    }
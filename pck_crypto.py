@@ -0,0 +1,306 @@
+import hashlib
+import io
+import os
+import struct
+import sys
+from collections import deque
+from itertools import islice
+from pathlib import Path
+
+from constants import PCK_KEY_ENV, PCK_KEY_FILENAME
+
+# Formato do FileAccessEncrypted do Godot (sem o "GDEC" dentro do PCK):
+# md5 dos dados originais, tamanho original (u64), IV, dados em AES-256-CFB completados até 16 bytes.
+AES_BLOCK_SIZE = 16
+KEY_SIZE = 32
+_BLOB_HEADER = struct.Struct("<16sQ16s")
+ENCRYPTED_HEADER_SIZE = _BLOB_HEADER.size
+CRYPTO_CHUNK_SIZE = 1024 * 1024  # múltiplo de AES_BLOCK_SIZE
+
+_configured_key = None
+
+
+class CryptoError(ValueError):
+    pass
+
+
+def _build_tables():
+    sbox = [0] * 256
+    p = q = 1
+    while True:
+        p ^= ((p << 1) ^ (0x1B if p & 0x80 else 0)) & 0xFF
+        q ^= q << 1
+        q ^= q << 2
+        q ^= q << 4
+        q &= 0xFF
+        if q & 0x80:
+            q ^= 0x09
+        x = q
+        for shift in range(1, 5):
+            x ^= ((q << shift) | (q >> (8 - shift))) & 0xFF
+        sbox[p] = x ^ 0x63
+        if p == 1:
+            break
+    sbox[0] = 0x63
+
+    t0 = []
+    for s in sbox:
+        s2 = ((s << 1) ^ (0x1B if s & 0x80 else 0)) & 0xFF
+        t0.append((s2 << 24) | (s << 16) | (s << 8) | (s2 ^ s))
+    t1 = [((t >> 8) | (t << 24)) & 0xFFFFFFFF for t in t0]
+    t2 = [((t >> 16) | (t << 16)) & 0xFFFFFFFF for t in t0]
+    t3 = [((t >> 24) | (t << 8)) & 0xFFFFFFFF for t in t0]
+    return sbox, t0, t1, t2, t3
+
+
+_SBOX, _T0, _T1, _T2, _T3 = _build_tables()
+
+
+def _expand_key(key):
+    words = list(struct.unpack(">8I", key))
+    rcon = 1
+    for i in range(8, 60):
+        temp = words[i - 1]
+        if i % 8 == 0:
+            temp = ((temp << 8) | (temp >> 24)) & 0xFFFFFFFF
+            temp = ((_SBOX[temp >> 24] << 24) | (_SBOX[(temp >> 16) & 0xFF] << 16) |
+                    (_SBOX[(temp >> 8) & 0xFF] << 8) | _SBOX[temp & 0xFF]) ^ (rcon << 24)
+            rcon = ((rcon << 1) ^ (0x1B if rcon & 0x80 else 0)) & 0xFF
+        elif i % 8 == 4:
+            temp = ((_SBOX[temp >> 24] << 24) | (_SBOX[(temp >> 16) & 0xFF] << 16) |
+                    (_SBOX[(temp >> 8) & 0xFF] << 8) | _SBOX[temp & 0xFF])
+        words.append(words[i - 8] ^ temp)
+    return words
+
+
+def _encrypt_block(rk, block):
+    # AES-256 com tabelas T; o CFB só usa a cifragem, nos dois sentidos.
+    t0, t1, t2, t3, sbox = _T0, _T1, _T2, _T3, _SBOX
+    s0 = (block >> 96) ^ rk[0]
+    s1 = ((block >> 64) & 0xFFFFFFFF) ^ rk[1]
+    s2 = ((block >> 32) & 0xFFFFFFFF) ^ rk[2]
+    s3 = (block & 0xFFFFFFFF) ^ rk[3]
+    for r in range(4, 56, 4):
+        s0, s1, s2, s3 = (
+            t0[s0 >> 24] ^ t1[(s1 >> 16) & 0xFF] ^ t2[(s2 >> 8) & 0xFF] ^ t3[s3 & 0xFF] ^ rk[r],
+            t0[s1 >> 24] ^ t1[(s2 >> 16) & 0xFF] ^ t2[(s3 >> 8) & 0xFF] ^ t3[s0 & 0xFF] ^ rk[r + 1],
+            t0[s2 >> 24] ^ t1[(s3 >> 16) & 0xFF] ^ t2[(s0 >> 8) & 0xFF] ^ t3[s1 & 0xFF] ^ rk[r + 2],
+            t0[s3 >> 24] ^ t1[(s0 >> 16) & 0xFF] ^ t2[(s1 >> 8) & 0xFF] ^ t3[s2 & 0xFF] ^ rk[r + 3])
+    out = 0
+    for a, b, c, d, k in ((s0, s1, s2, s3, rk[56]), (s1, s2, s3, s0, rk[57]),
+                          (s2, s3, s0, s1, rk[58]), (s3, s0, s1, s2, rk[59])):
+        out = (out << 32) | (((sbox[a >> 24] << 24) | (sbox[(b >> 16) & 0xFF] << 16) |
+                              (sbox[(c >> 8) & 0xFF] << 8) | sbox[d & 0xFF]) ^ k)
+    return out
+
+
+class _PythonCFB:
+    __slots__ = ("_round_keys", "_register", "_decrypt")
+
+    def __init__(self, key, iv, decrypt):
+        self._round_keys = _expand_key(key)
+        self._register = int.from_bytes(iv, "big")
+        self._decrypt = decrypt
+
+    def update(self, data):
+        if len(data) % AES_BLOCK_SIZE:
+            raise CryptoError("Os dados criptografados precisam ter tamanho múltiplo de 16 bytes.")
+        rk = self._round_keys
+        register = self._register
+        blocks = struct.unpack(f">{len(data) // 8}Q", data)
+        out = []
+        for i in range(0, len(blocks), 2):
+            block = (blocks[i] << 64) | blocks[i + 1]
+            result = block ^ _encrypt_block(rk, register)
+            register = block if self._decrypt else result
+            out.append(result >> 64)
+            out.append(result & 0xFFFFFFFFFFFFFFFF)
+        self._register = register
+        return struct.pack(f">{len(out)}Q", *out)
+
+
+def _cipher(key, iv, decrypt):
+    # O "cryptography" (OpenSSL) é bem mais rápido; sem ele, usa a implementação em Python puro.
+    try:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    except ImportError:
+        return _PythonCFB(key, iv, decrypt)
+    cipher = Cipher(algorithms.AES(key), modes.CFB(iv))
+    return cipher.decryptor() if decrypt else cipher.encryptor()
+
+
+def backend_name():
+    try:
+        import cryptography  # noqa: F401
+    except ImportError:
+        return "python"
+    return "cryptography"
+
+
+def encrypted_size(size):
+    return ENCRYPTED_HEADER_SIZE + size + (-size % AES_BLOCK_SIZE)
+
+
+def parse_key(text):
+    text = text.strip()
+    try:
+        key = bytes.fromhex(text)
+    except ValueError:
+        key = b""
+    if len(key) != KEY_SIZE:
+        raise CryptoError(f"Chave de criptografia inválida: são esperados {KEY_SIZE * 2} caracteres hexadecimais.")
+    return key
+
+
+def set_encryption_key(key):
+    global _configured_key
+    _configured_key = parse_key(key) if isinstance(key, str) else key
+
+
+def _application_path():
+    if getattr(sys, 'frozen', False):
+        return Path(sys.executable).parent
+    return Path(__file__).resolve().parent
+
+
+def encryption_key():
+    # Ordem: chave definida pelo programa (--key), variável de ambiente, arquivo ao lado do instalador.
+    if _configured_key is not None:
+        return _configured_key
+    if os.environ.get(PCK_KEY_ENV):
+        return parse_key(os.environ[PCK_KEY_ENV])
+    key_file = _application_path() / PCK_KEY_FILENAME
+    if key_file.is_file():
+        return parse_key(key_file.read_text(encoding="utf-8"))
+    return None
+
+
+def read_blob_header(data):
+    if len(data) < ENCRYPTED_HEADER_SIZE:
+        raise CryptoError("Cabeçalho de dados criptografados incompleto.")
+    return _BLOB_HEADER.unpack_from(data, 0)
+
+
+def decrypt_blob(blob, key):
+    md5, length, iv = read_blob_header(blob)
+    end = encrypted_size(length)
+    if len(blob) < end:
+        raise CryptoError("Dados criptografados incompletos.")
+    data = _cipher(key, iv, True).update(bytes(blob[ENCRYPTED_HEADER_SIZE:end]))[:length]
+    if hashlib.md5(data).digest() != md5:
+        raise CryptoError("Falha ao descriptografar: a chave está incorreta ou os dados estão corrompidos.")
+    return data
+
+
+def encrypt_blob(data, key, iv=None):
+    iv = iv or os.urandom(AES_BLOCK_SIZE)
+    padded = bytes(data) + b"\0" * (-len(data) % AES_BLOCK_SIZE)
+    return (_BLOB_HEADER.pack(hashlib.md5(data).digest(), len(data), iv) +
+            _cipher(key, iv, False).update(padded))
+
+
+def decrypt_stream(src, dst, key, chunk_size=CRYPTO_CHUNK_SIZE):
+    # Lê um bloco criptografado de src (posicionado no início dele) e grava os dados originais em dst;
+    # com dst=None apenas confere. Devolve (tamanho, md5 do cabeçalho, md5 calculado).
+    stored_md5, length, iv = read_blob_header(src.read(ENCRYPTED_HEADER_SIZE))
+    cipher = _cipher(key, iv, True)
+    md5 = hashlib.md5()
+    chunk_size -= chunk_size % AES_BLOCK_SIZE
+    remaining = length + (-length % AES_BLOCK_SIZE)
+    left = length
+    while remaining:
+        chunk = src.read(min(chunk_size, remaining))
+        if len(chunk) != min(chunk_size, remaining):
+            raise CryptoError("Dados criptografados incompletos.")
+        remaining -= len(chunk)
+        data = cipher.update(chunk)
+        if len(data) > left:
+            data = data[:left]
+        left -= len(data)
+        md5.update(data)
+        if dst is not None:
+            dst.write(data)
+    return length, stored_md5, md5.digest()
+
+
+def encrypt_stream(src, dst, key, chunk_size=CRYPTO_CHUNK_SIZE):
+    # O cabeçalho leva o MD5 e o tamanho, que só se conhece no fim: é reservado e preenchido depois.
+    # Devolve (tamanho original, md5 original); dst termina posicionado após o último bloco.
+    iv = os.urandom(AES_BLOCK_SIZE)
+    header_pos = dst.tell()
+    dst.write(b"\0" * ENCRYPTED_HEADER_SIZE)
+    cipher = _cipher(key, iv, False)
+    md5 = hashlib.md5()
+    chunk_size -= chunk_size % AES_BLOCK_SIZE
+    length = 0
+    pending = b""
+    while chunk := src.read(chunk_size):
+        md5.update(chunk)
+        length += len(chunk)
+        pending += chunk
+        ready = len(pending) - len(pending) % AES_BLOCK_SIZE
+        dst.write(cipher.update(pending[:ready]))
+        pending = pending[ready:]
+    if pending:
+        dst.write(cipher.update(pending + b"\0" * (AES_BLOCK_SIZE - len(pending))))
+    end = dst.tell()
+    dst.seek(header_pos)
+    dst.write(_BLOB_HEADER.pack(md5.digest(), length, iv))
+    dst.seek(end)
+    return length, md5.digest()
+
+
+def _encrypt_data(job):
+    data, key = job
+    buf = io.BytesIO()
+    size, md5 = encrypt_stream(io.BytesIO(data), buf, key)
+    return size, md5, buf.getvalue()
+
+
+def parallel_encryption(count, workers=None):
+    # Em Python puro a cifragem prende o GIL (cerca de 0,6 MB/s) e vale repartir entre processos;
+    # com o "cryptography" ela é rápida o bastante e abrir os processos só atrasaria.
+    return count > 1 and workers != 1 and backend_name() == "python"
+
+
+def encrypt_files(contents, key, workers=None):
+    # Cada arquivo tem o próprio IV, então são cifrados em paralelo. contents é lido aos poucos (os
+    # dados vão prontos para os processos, que não precisam saber de onde vieram) e os resultados,
+    # (tamanho, md5, bloco cifrado), saem na mesma ordem, com no máximo alguns à espera na memória.
+    from concurrent.futures import ProcessPoolExecutor
+    jobs = ((data, key) for data in contents)
+    limit = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(_encrypt_data, job) for job in islice(jobs, limit))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for job in islice(jobs, 1):
+                    pending.append(executor.submit(_encrypt_data, job))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _hash_encrypted_entry(job):
+    pck_path, offset, key, chunk_size = job
+    try:
+        with open(pck_path, "rb") as f:
+            f.seek(offset)
+            length, stored_md5, md5 = decrypt_stream(f, None, key, chunk_size)
+    except CryptoError as e:
+        return None, None, str(e)
+    return length, md5, None if md5 == stored_md5 else "conteúdo corrompido ou chave incorreta"
+
+
+def hash_encrypted_entries(pck_path, offsets, key, workers=None, chunk_size=CRYPTO_CHUNK_SIZE):
+    # Cada entrada tem o próprio IV, então são independentes; em Python puro a decifragem prende
+    # o GIL, por isso o trabalho é repartido entre processos. Gera (tamanho, md5, erro) em ordem.
+    jobs = [(str(pck_path), offset, key, chunk_size) for offset in offsets]
+    if len(jobs) <= 1 or workers == 1:
+        yield from map(_hash_encrypted_entry, jobs)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_hash_encrypted_entry, jobs)
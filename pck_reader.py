@@ -0,0 +1,170 @@
+import argparse
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from pck import (PACK_FILE_ENCRYPTED, PCKEntry, PCKError, iter_directory, normalize_pck_path, parse_header,
+                 read_index_mapped, require_key)
+from pck_crypto import CryptoError, decrypt_stream
+
+INDEX_CACHE_SIZE = 8
+
+
+class PCKIndex:
+    # Entradas em arrays paralelos ordenados pelo caminho normalizado: o índice do jogo completo
+    # tem dezenas de milhares de arquivos e um objeto por entrada custaria caro.
+    __slots__ = ("header", "keys", "paths", "offsets", "sizes", "flags", "md5s", "_positions")
+
+    def __init__(self, header, rows):
+        rows.sort(key=lambda row: row[0])
+        self.header = header
+        self.keys = [row[0] for row in rows]
+        self.paths = [row[1] for row in rows]
+        self.offsets = array("Q", (row[2] for row in rows))
+        self.sizes = array("Q", (row[3] for row in rows))
+        self.md5s = b"".join(row[4] for row in rows)
+        self.flags = array("I", (row[5] for row in rows))
+        self._positions = {key: i for i, key in enumerate(self.keys)}
+
+    @classmethod
+    def from_buffer(cls, buf):
+        header = parse_header(buf)
+        rows = [(normalize_pck_path(path), path, offset, size, md5, flags)
+                for path, offset, size, md5, flags, _ in iter_directory(buf)]
+        return cls(header, rows)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, path):
+        return normalize_pck_path(path) in self._positions
+
+    def position(self, path):
+        try:
+            return self._positions[normalize_pck_path(path)]
+        except KeyError:
+            raise PCKError(f"Arquivo \"{path}\" não existe no PCK.") from None
+
+    def md5(self, i):
+        return self.md5s[i * 16:(i + 1) * 16]
+
+    def data_offset(self, i):
+        return self.header.file_base + self.offsets[i]
+
+    def entry(self, i):
+        return PCKEntry(self.paths[i], self.offsets[i], self.sizes[i], self.md5(i), self.flags[i])
+
+    def prefix_range(self, prefix=""):
+        prefix = normalize_pck_path(prefix)
+        return range(bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + "\U0010ffff"))
+
+    def list(self, prefix=""):
+        return [self.keys[i] for i in self.prefix_range(prefix)]
+
+
+@lru_cache(maxsize=INDEX_CACHE_SIZE)
+def _load_index(pck_path, size, mtime_ns):
+    return read_index_mapped(pck_path, parser=PCKIndex.from_buffer)
+
+
+def load_index(pck_path):
+    pck_path = str(Path(pck_path).resolve())
+    st = os.stat(pck_path)
+    return _load_index(pck_path, st.st_size, st.st_mtime_ns)
+
+
+class PCKReader:
+    def __init__(self, pck_path):
+        self.pck_path = pck_path
+        self.index = load_index(pck_path)
+        self._file = open(pck_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # As fatias devolvidas por read() precisam ter sido liberadas antes do fechamento.
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def list(self, prefix=""):
+        return self.index.list(prefix)
+
+    def read_at(self, i):
+        if self.index.flags[i] & PACK_FILE_ENCRYPTED:
+            raise PCKError(f"Arquivo \"{self.index.keys[i]}\" está criptografado.")
+        start = self.index.data_offset(i)
+        end = start + self.index.sizes[i]
+        if end > len(self._mmap):
+            raise PCKError(f"Arquivo \"{self.index.keys[i]}\" aponta para fora do PCK.")
+        return self._view[start:end]
+
+    def read(self, path):
+        return self.read_at(self.index.position(path))
+
+    def decrypt_to(self, i, dst, key=None):
+        # Entradas criptografadas são lidas em blocos com um descritor próprio (seguro entre threads).
+        with open(self.pck_path, "rb") as f:
+            f.seek(self.index.data_offset(i))
+            try:
+                size, stored_md5, md5 = decrypt_stream(f, dst, key or require_key())
+            except CryptoError as e:
+                raise PCKError(f"Arquivo \"{self.index.keys[i]}\": {e}") from None
+        if md5 != stored_md5:
+            raise PCKError(f"Arquivo \"{self.index.keys[i]}\": a chave está incorreta ou os dados estão corrompidos.")
+        return size
+
+    def extract(self, prefix, dest_dir, workers=None):
+        dest_dir = Path(dest_dir)
+        prefix_range = self.index.prefix_range(prefix)
+        key = require_key() if any(self.index.flags[i] & PACK_FILE_ENCRYPTED for i in prefix_range) else None
+
+        def extract_one(i):
+            target = dest_dir / self.index.keys[i]
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if self.index.flags[i] & PACK_FILE_ENCRYPTED:
+                with open(target, "wb") as f:
+                    return self.decrypt_to(i, f, key)
+            with self.read_at(i) as data, open(target, "wb") as f:
+                f.write(data)
+            return self.index.sizes[i]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(extract_one, prefix_range))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspeciona e extrai arquivos de um PCK do Godot.")
+    parser.add_argument("pck", help="caminho do arquivo .pck")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="lista os arquivos do PCK")
+    list_parser.add_argument("prefix", nargs="?", default="")
+    extract_parser = subparsers.add_parser("extract", help="extrai os arquivos de um prefixo")
+    extract_parser.add_argument("prefix")
+    extract_parser.add_argument("dest")
+    extract_parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with PCKReader(args.pck) as reader:
+        if args.command == "list":
+            for i in reader.index.prefix_range(args.prefix):
+                print(f"{reader.index.sizes[i]:>12}  {reader.index.keys[i]}")
+        else:
+            total = reader.extract(args.prefix, args.dest, args.workers)
+            print(f"{len(reader.index.prefix_range(args.prefix))} arquivos extraídos ({total} bytes).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import re
+import time
+
+PERCENT_PATTERN = re.compile(r"(\d{1,3}(?:[.,]\d+)?)\s*%")
+
+
+class ProgressEvent:
+    __slots__ = ("phase", "done", "total", "entries_done", "entries_total", "current", "elapsed")
+
+    def __init__(self, phase, done, total, entries_done, entries_total, current, elapsed):
+        self.phase = phase
+        self.done = done
+        self.total = total
+        self.entries_done = entries_done
+        self.entries_total = entries_total
+        self.current = current
+        self.elapsed = elapsed
+
+    @property
+    def fraction(self):
+        return min(1.0, self.done / self.total) if self.total else 0.0
+
+    @property
+    def rate(self):
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        rate = self.rate
+        return (self.total - self.done) / rate if rate and self.total else None
+
+    def describe(self):
+        parts = [self.phase]
+        if self.entries_total:
+            parts.append(f"{self.entries_done}/{self.entries_total} arquivos")
+        if self.total:
+            parts.append(f"{self.rate / (1024 * 1024):.1f} MB/s")
+        if self.eta is not None and self.done < self.total:
+            parts.append(f"restante ~{format_duration(self.eta)}")
+        if self.current:
+            parts.append(self.current)
+        return " — ".join(parts)
+
+
+class ProgressTracker:
+    def __init__(self, callback, phase, total, entries_total=0):
+        self.callback = callback
+        self.phase = phase
+        self.total = total
+        self.entries_total = entries_total
+        self.done = 0
+        self.entries_done = 0
+        self.current = None
+        self.start = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def snapshot(self):
+        return ProgressEvent(self.phase, self.done, self.total, self.entries_done, self.entries_total,
+                             self.current, self.elapsed)
+
+    def advance(self, nbytes=0, entries=1, current=None):
+        self.done += nbytes
+        self.entries_done += entries
+        if current is not None:
+            self.current = current
+        if self.callback:
+            self.callback(self.snapshot())
+
+    def update(self, done, current=None):
+        self.advance(done - self.done, 0, current)
+
+
+def parse_percent(line):
+    match = PERCENT_PATTERN.search(line)
+    return float(match.group(1).replace(",", ".")) if match else None
+
+
+def format_duration(seconds):
+    if seconds < 10:
+        return f"{seconds:.1f} s"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    return f"{seconds // 60} min {seconds % 60:02d} s"
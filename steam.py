@@ -0,0 +1,224 @@
+import os
+import re
+import threading
+from pathlib import Path
+
+from constants import STEAM_APP_IDS, STEAM_FALLBACK_INSTALL_DIRS
+
+_VDF_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([{}])|(//[^\n]*)|([^\s{}"]+)')
+_VDF_ESCAPES = {"\\\\": "\\", "\\\"": "\"", "\\n": "\n", "\\t": "\t"}
+_VDF_ESCAPE = re.compile(r"\\[\\\"nt]")
+
+LINUX_STEAM_ROOTS = (
+    "~/.steam/steam",
+    "~/.local/share/Steam",
+    "~/.var/app/com.valvesoftware.Steam/.local/share/Steam",
+)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class VDFError(ValueError):
+    pass
+
+
+class SteamInstall:
+    __slots__ = ("app_id", "name", "path")
+
+    def __init__(self, app_id, name, path):
+        self.app_id = app_id
+        self.name = name
+        self.path = path
+
+    def __repr__(self):
+        return f"SteamInstall({self.app_id!r}, {self.name!r}, {self.path!r})"
+
+
+def _tokens(text):
+    for match in _VDF_TOKEN.finditer(text):
+        quoted, brace, comment, bare = match.groups()
+        if comment is not None:
+            continue
+        if brace is not None:
+            yield brace, False
+        elif quoted is not None:
+            yield _VDF_ESCAPE.sub(lambda m: _VDF_ESCAPES[m.group(0)], quoted), True
+        elif not bare.startswith("["):
+            # Condicionais como [$WIN] acompanham o valor anterior e são ignorados.
+            yield bare, True
+
+
+def parse_vdf(text):
+    # Formato texto do Valve KeyValues (libraryfolders.vdf, appmanifest_*.acf). Chaves em minúsculas.
+    root = {}
+    stack = [root]
+    key = None
+    for token, is_string in _tokens(text):
+        if not is_string:
+            if token == "{":
+                if key is None:
+                    raise VDFError("Bloco sem nome no arquivo VDF.")
+                child = {}
+                stack[-1][key] = child
+                stack.append(child)
+                key = None
+            else:
+                if len(stack) == 1 or key is not None:
+                    raise VDFError("Chave \"}\" inesperada no arquivo VDF.")
+                stack.pop()
+        elif key is None:
+            key = token.lower()
+        else:
+            stack[-1][key] = token
+            key = None
+    if len(stack) != 1 or key is not None:
+        raise VDFError("Arquivo VDF incompleto.")
+    return root
+
+
+def load_vdf(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_vdf(f.read())
+
+
+def windows_registry_steam_path():
+    try:
+        import winreg
+    except ImportError:
+        return None
+
+    keys_to_try = [
+        (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Valve\Steam"),
+        (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Valve\Steam"),
+        (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Valve\Steam"),
+    ]
+    for hkey, key_path in keys_to_try:
+        for value_name in ("InstallPath", "SteamPath"):
+            try:
+                with winreg.OpenKey(hkey, key_path) as key:
+                    steam_path, _ = winreg.QueryValueEx(key, value_name)
+                    return steam_path
+            except OSError:
+                continue
+    return None
+
+
+def steam_roots(registry=windows_registry_steam_path, extra_roots=LINUX_STEAM_ROOTS):
+    roots = []
+    candidates = [registry() if registry else None]
+    if os.name != 'nt':
+        candidates.extend(os.path.expanduser(root) for root in extra_roots)
+    for candidate in candidates:
+        if not candidate:
+            continue
+        root = Path(candidate)
+        if not (root / "steamapps").is_dir():
+            continue
+        resolved = root.resolve()
+        # ~/.steam/steam costuma ser um link para ~/.local/share/Steam.
+        if resolved not in roots:
+            roots.append(resolved)
+    return roots
+
+
+def library_index(steamapps_dir):
+    # app ID -> pasta steamapps da biblioteca onde o jogo está instalado, a partir de libraryfolders.vdf.
+    # Também devolve as bibliotecas sem bloco "apps" (formato antigo), as únicas que precisam ser procuradas.
+    steamapps_dir = Path(steamapps_dir)
+    libraries = [steamapps_dir]
+    apps = {}
+    indexed = set()
+    try:
+        folders = load_vdf(steamapps_dir / "libraryfolders.vdf").get("libraryfolders", {})
+    except (OSError, VDFError):
+        folders = {}
+    for key, value in folders.items():
+        if not key.isdigit():
+            continue
+        # Formato antigo: "1" "D:\\SteamLibrary"; formato novo: "1" { "path" ... "apps" { ... } }.
+        path = value if isinstance(value, str) else value.get("path")
+        if not path:
+            continue
+        library = Path(path) / "steamapps"
+        if library not in libraries:
+            libraries.append(library)
+        if isinstance(value, dict) and isinstance(value.get("apps"), dict):
+            indexed.add(library)
+            for app_id in value["apps"]:
+                apps.setdefault(app_id, library)
+    return libraries, apps, [library for library in libraries if library not in indexed]
+
+
+def _manifest_install(library, app_id):
+    try:
+        manifest = load_vdf(library / f"appmanifest_{app_id}.acf").get("appstate", {})
+    except (OSError, VDFError):
+        return None
+    install_dir = manifest.get("installdir")
+    if not install_dir:
+        return None
+    game_path = library / "common" / install_dir
+    if not game_path.is_dir():
+        return None
+    return SteamInstall(app_id, manifest.get("name", install_dir), str(game_path))
+
+
+def _resolve_installs(libraries, apps, unindexed, app_ids, fallback_dirs):
+    installs = []
+    for app_id in app_ids:
+        library = apps.get(app_id)
+        # Fora do bloco "apps", o jogo só pode estar numa biblioteca do formato antigo.
+        for candidate in ([library] if library else unindexed):
+            install = _manifest_install(candidate, app_id)
+            if install:
+                installs.append(install)
+                break
+
+    # Pelo nome da pasta: para jogos com app ID, só nas bibliotecas sem índice, porque nas demais o bloco
+    # "apps" já diz o que está instalado; sem app ID, não há como saber pelo índice.
+    found = {Path(install.path) for install in installs}
+    found_ids = {install.app_id for install in installs}
+    for install_dir, app_id in fallback_dirs.items():
+        if app_id is not None and app_id in found_ids:
+            continue
+        for library in (unindexed if app_id is not None else libraries):
+            game_path = library / "common" / install_dir
+            if game_path not in found and game_path.is_dir():
+                installs.append(SteamInstall(None, install_dir, str(game_path)))
+                found.add(game_path)
+                break
+    return installs
+
+
+def find_game_installs(registry=windows_registry_steam_path, extra_roots=LINUX_STEAM_ROOTS,
+                       app_ids=STEAM_APP_IDS, fallback_dirs=STEAM_FALLBACK_INSTALL_DIRS):
+    installs = []
+    for root in steam_roots(registry, extra_roots):
+        steamapps_dir = root / "steamapps"
+        vdf_path = steamapps_dir / "libraryfolders.vdf"
+        try:
+            stamp = vdf_path.stat().st_mtime_ns
+        except OSError:
+            stamp = None
+        cache_key = (str(steamapps_dir), tuple(app_ids), tuple(fallback_dirs.items()))
+
+        with _cache_lock:
+            cached = _cache.get(cache_key)
+        if cached and cached[0] == stamp and all(Path(i.path).is_dir() for i in cached[1]):
+            root_installs = cached[1]
+        else:
+            libraries, apps, unindexed = library_index(steamapps_dir)
+            root_installs = _resolve_installs(libraries, apps, unindexed, app_ids, fallback_dirs)
+            with _cache_lock:
+                _cache[cache_key] = (stamp, root_installs)
+
+        for install in root_installs:
+            if all(install.path != other.path for other in installs):
+                installs.append(install)
+    return installs
+
+
+if __name__ == "__main__":
+    for install in find_game_installs():
+        print(f"{install.app_id or '-'}\t{install.name}\t{install.path}")
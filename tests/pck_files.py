@@ -0,0 +1,48 @@
+import hashlib
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from constants import GODOT_VERSION_STR
+from pck import (DIRECTORY_OFFSET, PACK_DIR_ENCRYPTED, PACK_FILE_ENCRYPTED, PCK_FORMAT_VERSION, RES_PREFIX, PCKEntry,
+                 PCKHeader, align, directory_size, read_index, serialize_directory, serialize_header)
+from pck_crypto import decrypt_blob, encrypt_blob, encrypted_size
+
+KEY = bytes(range(32))
+
+
+def write_pck(path, files, key=None, encrypt_dir=False, res_prefix=True):
+    # PCK mínimo no formato do jogo: files é um dict caminho -> conteúdo. Com key, os arquivos são
+    # criptografados (e o diretório também, com encrypt_dir).
+    paths = [(RES_PREFIX if res_prefix else "") + key_path for key_path in files]
+    file_base = align(DIRECTORY_OFFSET + directory_size(paths, encrypt_dir))
+    _, major, minor, patch = (int(part) for part in GODOT_VERSION_STR.split("."))
+    flags = PACK_DIR_ENCRYPTED if encrypt_dir else 0
+    entries = []
+    with open(path, "wb") as f:
+        f.write(serialize_header(PCKHeader(PCK_FORMAT_VERSION, major, minor, patch, flags, file_base)))
+        f.seek(file_base)
+        for pck_path, data in zip(paths, files.values()):
+            stored = encrypt_blob(data, key) if key else data
+            entries.append(PCKEntry(pck_path, f.tell() - file_base, len(data), hashlib.md5(data).digest(),
+                                    PACK_FILE_ENCRYPTED if key else 0))
+            f.write(stored + b"\0" * (-len(stored) % 16))
+        f.seek(DIRECTORY_OFFSET)
+        f.write(serialize_directory(entries, key if encrypt_dir else None))
+
+
+def read_pck(path, key=None):
+    # Conteúdo de cada entrada (descriptografado com key), conferido com o MD5 do diretório.
+    files = {}
+    with open(path, "rb") as f:
+        header, entries, _ = read_index(f)
+        for entry in entries:
+            f.seek(header.file_base + entry.offset)
+            if entry.encrypted:
+                data = decrypt_blob(f.read(encrypted_size(entry.size)), key)
+            else:
+                data = f.read(entry.size)
+            assert hashlib.md5(data).digest() == entry.md5, entry.path
+            files[entry.path] = data
+    return files
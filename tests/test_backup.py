@@ -0,0 +1,130 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from backup import BackupError, DeltaBackup, restore_delta_backup, update_delta_backup
+from journal import PatchJournal, roll_back_directory, roll_forward_directory
+from pck import PCKError, collect_assets, patch_pck, write_patch_marker
+from pck_files import read_pck, write_pck
+
+GAME_FILES = {
+    "assets/images/logo.png": b"\x89PNG logo" * 20,
+    "assets/story/1/1a/intro.inkb": b"original 1" * 50,
+    "assets/databases/items.json": b"{}",
+}
+TRANSLATION = {
+    "story/1/1a/intro.inkb": b"traduzido 1" * 40,
+    "story/2/1/nova.inkb": b"cena nova" * 10,
+}
+
+
+class DeltaBackupTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.folder = Path(self.tmp.name)
+        self.path = self.folder / "UntilThen.pck"
+        self.backup_path = self.folder / "UntilThenOLD.pckbak"
+        self.original = os.urandom(200_000)
+        self.path.write_bytes(self.original)
+
+    def overwrite(self, offset, data, append=b""):
+        with open(self.path, "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.seek(0, os.SEEK_END)
+            f.write(append)
+
+    def test_capture_and_restore_is_byte_identical(self):
+        with open(self.path, "r+b") as f:
+            backup = DeltaBackup.create(f, full_hash=True)
+            backup.capture(f, [(0, 4096), (2048, 8192), (199_000, 210_000)])
+        # Trechos sobrepostos e o que passa do fim original não são guardados em dobro.
+        self.assertEqual(backup.size, 8192 + 1000)
+        self.overwrite(0, b"\0" * 8192, append=b"anexado" * 100)
+        self.overwrite(199_500, b"x" * 500)
+        with open(self.path, "r+b") as f:
+            backup.restore(f)
+        self.assertEqual(self.path.read_bytes(), self.original)
+
+    def test_restore_checks_the_whole_file(self):
+        with open(self.path, "r+b") as f:
+            backup = DeltaBackup.create(f, full_hash=True)
+            backup.capture(f, [(0, 4096)])
+        self.overwrite(0, b"\0" * 4096)
+        # Um byte alterado fora dos trechos guardados e longe do fim só aparece no hash completo.
+        self.overwrite(50_000, b"\xff" if self.original[50_000] != 0xff else b"\0")
+        with open(self.path, "r+b") as f, self.assertRaises(PCKError):
+            backup.restore(f)
+
+    def test_backup_is_carried_across_two_installs(self):
+        with open(self.path, "r+b") as f:
+            update_delta_backup(self.backup_path, f, [(0, 4096)])
+        self.overwrite(0, b"\0" * 4096, append="primeira instalação".encode())
+        with open(self.path, "r+b") as f:
+            write_patch_marker(f)
+            # A segunda instalação sobrescreve um trecho maior; só o que falta é lido do arquivo atual.
+            backup = update_delta_backup(self.backup_path, f, [(0, 16_384)])
+        self.assertEqual(backup.size, 16_384)
+        self.overwrite(0, b"\1" * 16_384, append="segunda instalação".encode())
+        restore_delta_backup(self.path, self.backup_path)
+        self.assertEqual(self.path.read_bytes(), self.original)
+        self.assertFalse(self.backup_path.exists())
+
+    def test_modified_pck_without_backup_is_refused(self):
+        with open(self.path, "r+b") as f:
+            write_patch_marker(f)
+            with self.assertRaises(BackupError):
+                update_delta_backup(self.backup_path, f, [(0, 4096)])
+        self.assertFalse(self.backup_path.exists())
+
+    def test_backup_of_another_game_version_is_refused_on_modified_pck(self):
+        with open(self.path, "r+b") as f:
+            update_delta_backup(self.backup_path, f, [(0, 4096)])
+        # Atualização do jogo: o fim do arquivo muda e a cópia deixa de corresponder.
+        self.overwrite(len(self.original) - 10, b"atualizado")
+        with open(self.path, "r+b") as f:
+            write_patch_marker(f)
+            with self.assertRaises(BackupError):
+                update_delta_backup(self.backup_path, f, [(0, 4096)])
+
+
+class JournalDirectoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.folder = Path(self.tmp.name)
+        self.pck_path = self.folder / "UntilThen.pck"
+        write_pck(self.pck_path, GAME_FILES)
+        self.original = self.pck_path.read_bytes()
+        assets_dir = self.folder / "assets"
+        for rel_path, data in TRANSLATION.items():
+            (assets_dir / rel_path).parent.mkdir(parents=True, exist_ok=True)
+            (assets_dir / rel_path).write_bytes(data)
+        self.assets = collect_assets(assets_dir)
+        self.journal_file = self.folder / "UntilThen.pck.journal"
+        # Interrompe logo depois de o diário entrar na fase "directory", antes de o diretório ser gravado.
+        with mock.patch("pck.write_patch_marker", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                patch_pck(self.pck_path, self.assets, journal=PatchJournal(self.journal_file))
+        self.journal = PatchJournal.load(self.journal_file)
+        self.assertEqual(self.journal.phase, "directory")
+
+    def test_roll_forward_completes_the_install(self):
+        roll_forward_directory(self.pck_path, self.journal)
+        expected = {"res://" + key: data for key, data in GAME_FILES.items()}
+        expected.update({"res://assets/" + key: data for key, data in TRANSLATION.items()})
+        self.assertEqual(read_pck(self.pck_path), expected)
+
+    def test_roll_back_restores_the_original(self):
+        roll_back_directory(self.pck_path, self.journal)
+        self.assertEqual(self.pck_path.read_bytes(), self.original)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import fingerprint
+from pck_files import write_pck
+
+
+GAME_FILES = {
+    "assets/story/1/1a/intro.inkb": b"original 1",
+    "assets/story/2/1/cena.inkb": b"original 2",
+    "assets/databases/items.json": b"{}",
+    "assets/images/logo.png": b"\x89PNG logo",
+}
+
+
+class FingerprintTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp.name)
+        cache_env = "LOCALAPPDATA" if os.name == 'nt' else "XDG_CACHE_HOME"
+        patcher = mock.patch.dict(os.environ, {cache_env: str(self.folder / "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        fingerprint._cache = None
+        self.addCleanup(setattr, fingerprint, "_cache", None)
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, files):
+        path = self.folder / name
+        write_pck(path, files)
+        return path
+
+    def test_known_build_is_detected(self):
+        pck_path = self.write("UntilThen.pck", GAME_FILES)
+        build_id = fingerprint.compute_build(pck_path).build_id
+        with mock.patch.dict(fingerprint.KNOWN_GAME_BUILDS, {build_id: ("Completa", "1.0.0 (Steam)")}):
+            build = fingerprint.identify_build(pck_path)
+            self.assertTrue(build.known)
+            self.assertEqual(build.variant, "Completa")
+            self.assertEqual(build.label, "1.0.0 (Steam)")
+            self.assertFalse(build.outdated_translation_risk)
+
+    def test_installed_translation_keeps_build_id(self):
+        original = fingerprint.compute_build(self.write("original.pck", GAME_FILES))
+        translated = dict(GAME_FILES)
+        translated["assets/story/1/1a/intro.inkb"] = b"traduzido 1"
+        translated["assets/databases/items.json"] = b'{"nome": "item"}'
+        self.assertEqual(fingerprint.compute_build(self.write("traduzido.pck", translated)).build_id,
+                         original.build_id)
+
+    def test_other_build_of_known_variant_is_flagged(self):
+        known_id = fingerprint.compute_build(self.write("conhecida.pck", GAME_FILES)).build_id
+        updated = dict(GAME_FILES)
+        updated["assets/images/logo.png"] = b"\x89PNG logo novo"
+        pck_path = self.write("UntilThen.pck", updated)
+        # Os PCKs de teste são minúsculos; sem o limite, o tamanho também indica a versão completa.
+        with mock.patch.dict(fingerprint.KNOWN_GAME_BUILDS, {known_id: ("Completa", "1.0.0 (Steam)")}), \
+                mock.patch.object(fingerprint, "DEMO_PCK_SIZE", 0):
+            build = fingerprint.identify_build(pck_path)
+            self.assertFalse(build.known)
+            self.assertEqual(build.variant, "Completa")
+            self.assertFalse(build.variant_mismatch)
+            self.assertTrue(build.outdated_translation_risk)
+
+    def test_unknown_build_uses_pck_size_and_flags_mismatch(self):
+        # Um PCK pequeno com arquivos do capítulo 2 continua sendo a demo, mas a divergência é apontada.
+        build = fingerprint.identify_build(self.write("UntilThen.pck", GAME_FILES))
+        self.assertFalse(build.known)
+        self.assertEqual(build.detected_variant, "Completa")
+        self.assertEqual(build.variant, "Demo")
+        self.assertTrue(build.variant_mismatch)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from backup import restore_delta_backup, update_delta_backup
+from journal import PatchJournal
+from pck import collect_assets, has_patch_marker, patch_pck
+from pck_files import read_pck, write_pck
+
+# A primeira entrada não é traduzida: se o diretório crescer, ela precisa ser realocada.
+GAME_FILES = {
+    "assets/images/logo.png": b"\x89PNG logo" * 20,
+    "assets/story/1/1a/intro.inkb": b"original 1" * 50,
+    "assets/story/1/1a/fim.inkb": b"original 2" * 30,
+    "assets/databases/items.json": b"{}",
+    "assets/sounds/tema.ogg": b"OggS" * 300,
+}
+
+
+def translation(version):
+    return {
+        "story/1/1a/intro.inkb": f"traduzido {version} ".encode() * 40,
+        "story/1/1a/fim.inkb": f"fim {version} ".encode() * 70,
+        "databases/items.json": f'{{"nome": "item {version}"}}'.encode(),
+    }
+
+
+def added_files(count):
+    return {f"story/2/{i}/nova.inkb": f"cena nova {i} ".encode() * (i + 1) for i in range(count)}
+
+
+class PatchPCKTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.folder = Path(self.tmp.name)
+        self.pck_path = self.folder / "UntilThen.pck"
+        self.backup_path = self.folder / "UntilThenOLD.pckbak"
+
+    def write_translation(self, name, files):
+        assets_dir = self.folder / name / "assets"
+        for rel_path, data in files.items():
+            path = assets_dir / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        return collect_assets(assets_dir)
+
+    def before_write(self, f, ranges, original_size):
+        update_delta_backup(self.backup_path, f, ranges, original_size)
+
+    def expected(self, files, prefix="res://"):
+        expected = {prefix + key: data for key, data in GAME_FILES.items()}
+        expected.update({prefix + "assets/" + key: data for key, data in files.items()})
+        return expected
+
+    def test_patch_repatch_and_restore_is_byte_identical(self):
+        write_pck(self.pck_path, GAME_FILES)
+        original = self.pck_path.read_bytes()
+
+        first = translation(1)
+        patch_pck(self.pck_path, self.write_translation("v1", first), self.before_write)
+        self.assertEqual(read_pck(self.pck_path), self.expected(first))
+        with open(self.pck_path, "rb") as f:
+            self.assertTrue(has_patch_marker(f))
+
+        second = dict(translation(2), **added_files(3))
+        patch_pck(self.pck_path, self.write_translation("v2", second), self.before_write)
+        self.assertEqual(read_pck(self.pck_path), self.expected(second))
+
+        restore_delta_backup(self.pck_path, self.backup_path)
+        self.assertEqual(self.pck_path.read_bytes(), original)
+        self.assertFalse(self.backup_path.exists())
+
+    def test_added_entries_grow_directory_and_relocate_data(self):
+        write_pck(self.pck_path, GAME_FILES)
+        files = dict(translation(1), **added_files(6))
+        stats = patch_pck(self.pck_path, self.write_translation("v1", files))
+        self.assertEqual(stats["added"], 6)
+        self.assertEqual(stats["replaced"], 3)
+        self.assertGreaterEqual(stats["relocated"], 1)
+        self.assertEqual(read_pck(self.pck_path), self.expected(files))
+
+    def test_bare_paths_stay_without_res_prefix(self):
+        write_pck(self.pck_path, GAME_FILES, res_prefix=False)
+        files = dict(translation(1), **added_files(2))
+        patch_pck(self.pck_path, self.write_translation("v1", files))
+        self.assertEqual(read_pck(self.pck_path), self.expected(files, prefix=""))
+
+    def test_interrupted_run_resumes_from_journal(self):
+        write_pck(self.pck_path, GAME_FILES)
+        original = self.pck_path.read_bytes()
+        files = dict(translation(1), **added_files(8))
+        assets = self.write_translation("v1", files)
+        journal_file = self.folder / "UntilThen.pck.journal"
+        written = []
+
+        def interrupt(snapshot):
+            written.append(snapshot)
+            if len(written) == 6:
+                raise KeyboardInterrupt
+
+        # Um checkpoint por arquivo, para que a retomada tenha o que aproveitar.
+        with mock.patch("journal.JOURNAL_CHECKPOINT_BYTES", 1):
+            with self.assertRaises(KeyboardInterrupt):
+                patch_pck(self.pck_path, assets, self.before_write, interrupt, PatchJournal(journal_file))
+            # O diretório original continua válido enquanto só os dados foram anexados.
+            self.assertEqual(read_pck(self.pck_path), self.expected({}))
+            stats = patch_pck(self.pck_path, assets, self.before_write, None, PatchJournal.load(journal_file))
+
+        self.assertGreater(stats["resumed"], 0)
+        self.assertFalse(journal_file.exists())
+        self.assertEqual(read_pck(self.pck_path), self.expected(files))
+        restore_delta_backup(self.pck_path, self.backup_path)
+        self.assertEqual(self.pck_path.read_bytes(), original)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pck_crypto
+from bundle import TranslationBundle, build_bundle
+from constants import FULL_TRANSLATION_SUBDIR, MAIN_SUBDIR_NAME
+from pck import PCKEncryptionError, collect_assets, patch_pck
+from pck_files import KEY, read_pck, write_pck
+
+GAME_FILES = {
+    "assets/story/1/1a/intro.inkb": b"original 1" * 50,
+    "assets/story/1/1a/fim.inkb": b"original 2" * 30,
+    "assets/databases/items.json": b"{}",
+    "assets/images/logo.png": b"\x89PNG logo",
+}
+TRANSLATION = {
+    "story/1/1a/intro.inkb": b"traduzido 1" * 40,
+    "story/1/1a/fim.inkb": b"traduzido 2" * 70,
+    "databases/items.json": b'{"nome": "item"}',
+    "story/1/1a/nova.inkb": b"cena nova",
+}
+
+
+class EncryptedPatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.folder = Path(self.tmp.name)
+        self.addCleanup(pck_crypto.set_encryption_key, None)
+        pck_crypto.set_encryption_key(KEY)
+        self.assets_dir = self.folder / FULL_TRANSLATION_SUBDIR / MAIN_SUBDIR_NAME
+        for rel_path, data in TRANSLATION.items():
+            path = self.assets_dir / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        self.pck_path = self.folder / "UntilThen.pck"
+
+    def expected(self):
+        files = {"res://" + key: data for key, data in GAME_FILES.items()}
+        files.update({"res://assets/" + key: data for key, data in TRANSLATION.items()})
+        return files
+
+    def test_wrong_key_is_refused_before_writing(self):
+        write_pck(self.pck_path, GAME_FILES, key=KEY)
+        original = self.pck_path.read_bytes()
+        pck_crypto.set_encryption_key(bytes(32))
+        with self.assertRaises(PCKEncryptionError):
+            patch_pck(self.pck_path, collect_assets(self.assets_dir))
+        self.assertEqual(self.pck_path.read_bytes(), original)
+
+    def test_bundle_assets_are_encrypted_in_parallel(self):
+        write_pck(self.pck_path, GAME_FILES, key=KEY, encrypt_dir=True)
+        bundle_path = self.folder / "translation_files.zip"
+        build_bundle(self.folder, bundle_path)
+        with mock.patch("pck.parallel_encryption", return_value=True), TranslationBundle(bundle_path) as bundle:
+            stats = patch_pck(self.pck_path, bundle.assets("Completa"), workers=2)
+        self.assertEqual(stats["added"], 1)
+        self.assertEqual(read_pck(self.pck_path, KEY), self.expected())
+
+    def test_parallel_and_serial_encryption_match(self):
+        for parallel in (False, True):
+            write_pck(self.pck_path, GAME_FILES, key=KEY)
+            with mock.patch("pck.parallel_encryption", return_value=parallel):
+                patch_pck(self.pck_path, collect_assets(self.assets_dir), workers=2)
+            self.assertEqual(read_pck(self.pck_path, KEY), self.expected())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import steam
+
+
+class FindGameInstallsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        steam._cache.clear()
+        self.addCleanup(steam._cache.clear)
+
+    def library(self, name, *install_dirs):
+        library = self.root / name
+        for install_dir in install_dirs:
+            (library / "steamapps" / "common" / install_dir).mkdir(parents=True)
+        (library / "steamapps").mkdir(parents=True, exist_ok=True)
+        return library
+
+    def write_folders(self, text):
+        (self.root / "main" / "steamapps" / "libraryfolders.vdf").write_text(text, encoding="utf-8")
+
+    def find(self):
+        installs = steam.find_game_installs(registry=lambda: str(self.root / "main"), extra_roots=())
+        return sorted(((install.app_id, Path(install.path).relative_to(self.root).as_posix()) for install in installs),
+                      key=lambda install: install[1])
+
+    def test_current_library_format_finds_full_game_and_demo(self):
+        main = self.library("main", "Until Then Demo")
+        other = self.library("other", "Until Then")
+        (other / "steamapps" / "appmanifest_1574820.acf").write_text(
+            '"AppState" { "appid" "1574820" "name" "Until Then" "installdir" "Until Then" }', encoding="utf-8")
+        self.write_folders('"libraryfolders" { "0" { "path" "%s" "apps" { "228980" "1" } } '
+                           '"1" { "path" "%s" "apps" { "1574820" "1" } } }' % (main.as_posix(), other.as_posix()))
+        self.assertEqual(self.find(), [(None, "main/steamapps/common/Until Then Demo"),
+                                       ("1574820", "other/steamapps/common/Until Then")])
+
+    def test_uninstalled_game_is_not_found_by_folder_name_in_indexed_library(self):
+        # Uma pasta que sobrou de uma desinstalação não conta se o bloco "apps" diz que o jogo não está lá.
+        main = self.library("main", "Until Then")
+        self.write_folders('"libraryfolders" { "0" { "path" "%s" "apps" { "228980" "1" } } }' % main.as_posix())
+        self.assertEqual(self.find(), [])
+
+    def test_old_library_format_is_searched_by_folder_name(self):
+        self.library("main")
+        old = self.library("old", "Until Then", "Until Then Demo")
+        self.write_folders('"libraryfolders" { "1" "%s" }' % old.as_posix())
+        self.assertEqual(self.find(), [(None, "old/steamapps/common/Until Then"),
+                                       (None, "old/steamapps/common/Until Then Demo")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -37,6 +37,8 @@ def create_widgets(app):
     app.path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
     app.browse_button = ttk.Button(path_frame, text="Procurar...", command=app.browse_game_folder)
     app.browse_button.pack(side=tk.LEFT)
+    app.path_status_label = ttk.Label(content_frame, text="", foreground="gray")
+    app.path_status_label.pack(anchor=tk.W, pady=(0, 5))
 
     status_frame = ttk.LabelFrame(content_frame, text=" Mensagens ")
     status_frame.pack(fill=tk.BOTH, expand=True, pady=5)
@@ -53,12 +55,27 @@ def create_widgets(app):
     backup_frame = ttk.Frame(content_frame)
     backup_frame.pack(fill=tk.X, pady=(5, 0))
     ttk.Checkbutton(backup_frame, text=f"Manter cópia do arquivo original (UntilThen.pck)", variable=app.keep_backup_var).pack(anchor=tk.W)
+
+    app.details_bar = ttk.Frame(content_frame)
+    app.details_bar.pack(fill=tk.X)
+    app.details_button = ttk.Button(app.details_bar, text="Detalhes ▸", state=tk.DISABLED, command=app.toggle_details)
+    app.details_button.pack(side=tk.LEFT)
+    app.save_report_button = ttk.Button(app.details_bar, text="Salvar relatório...", state=tk.DISABLED, command=app.save_report)
+    app.save_report_button.pack(side=tk.LEFT, padx=(5, 0))
+    app.details_frame = ttk.LabelFrame(content_frame, text=" Detalhes da última operação ")
+    app.details_text = tk.Text(app.details_frame, height=8, wrap=tk.NONE, relief=tk.FLAT, borderwidth=0, font=("Consolas", 9), state=tk.DISABLED, bg=app.root.cget('bg'))
+    app.details_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
     
     app.progress_bar_frame = ttk.Frame(content_frame)
     app.progress_bar = ttk.Progressbar(app.progress_bar_frame, orient='horizontal', mode='determinate', length=300, maximum=100)
+    app.progress_label = ttk.Label(app.progress_bar_frame, text="")
 
     footer_frame = ttk.Frame(app.root, padding=10)
     footer_frame.pack(fill=tk.X, side=tk.BOTTOM)
     ttk.Separator(footer_frame, orient='horizontal').pack(fill='x', pady=(0, 10))
     app.apply_button = ttk.Button(footer_frame, text="Aplicar", state=tk.DISABLED, command=app.start_patch_thread)
     app.apply_button.pack(side=tk.RIGHT, padx=(5, 0))
+    app.restore_button = ttk.Button(footer_frame, text="Restaurar Original", state=tk.DISABLED, command=app.start_restore_thread)
+    app.restore_button.pack(side=tk.LEFT)
+    app.verify_button = ttk.Button(footer_frame, text="Verificar", state=tk.DISABLED, command=app.start_verify_thread)
+    app.verify_button.pack(side=tk.LEFT, padx=(5, 0))
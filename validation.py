@@ -0,0 +1,89 @@
+import os
+import stat
+import threading
+from pathlib import Path
+
+from constants import PCK_FILENAME
+from patching import (ValidationError, check_pck_file, detect_game_variant, recover_interrupted_patch,
+                      restorable_backup)
+
+MEMO_MAX_ENTRIES = 32
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+class PathValidation:
+    __slots__ = ("path", "stamp", "pck_path", "variant", "build", "backup", "messages", "error")
+
+    def __init__(self, path, stamp=None):
+        self.path = path
+        self.stamp = stamp
+        self.pck_path = None
+        self.variant = None
+        self.build = None
+        self.backup = None
+        self.messages = []
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.variant is not None
+
+    def _log(self, message, error=False, **kwargs):
+        self.messages.append((message, error))
+
+
+def _stamp(path):
+    # Criar/remover arquivos na pasta muda o mtime dela; atualizar o jogo muda o tamanho/mtime do PCK.
+    folder = os.stat(path)
+    if not stat.S_ISDIR(folder.st_mode):
+        return None
+    try:
+        pck = os.stat(Path(path) / PCK_FILENAME)
+        pck_stamp = (pck.st_size, pck.st_mtime_ns)
+    except OSError:
+        pck_stamp = None
+    return folder.st_mtime_ns, pck_stamp
+
+
+def validate_game_folder(path):
+    if not path or not os.path.isdir(path):
+        return PathValidation(path)
+
+    # Uma instalação interrompida é concluída ou desfeita antes de olhar o PCK.
+    recovery = PathValidation(path)
+    try:
+        recover_interrupted_patch(path, recovery._log)
+    except Exception as e:
+        recovery._log(f"ERRO ao recuperar uma instalação interrompida: {e}", error=True)
+
+    try:
+        stamp = _stamp(path)
+    except OSError:
+        stamp = None
+    if stamp is None:
+        return PathValidation(path)
+
+    with _memo_lock:
+        cached = _memo.get(path)
+    if cached is not None and cached.stamp == stamp and not recovery.messages:
+        return cached
+
+    result = PathValidation(path, stamp)
+    result.messages.extend(recovery.messages)
+    try:
+        result.pck_path = check_pck_file(path)
+        result.variant, result.build = detect_game_variant(result.pck_path, result._log)
+        result.backup = restorable_backup(result.pck_path)
+    except ValidationError as e:
+        result.error = e
+    except OSError as e:
+        result.error = ValidationError(f"ERRO ao acessar \"{path}\": {e}")
+
+    with _memo_lock:
+        _memo.pop(path, None)
+        _memo[path] = result
+        while len(_memo) > MEMO_MAX_ENTRIES:
+            _memo.pop(next(iter(_memo)))
+    return result
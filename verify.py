@@ -0,0 +1,125 @@
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from delta import EMPTY_MD5, md5_file
+from pck import PACK_FILE_ENCRYPTED, PCKError, require_key
+from pck_crypto import encrypted_size, hash_encrypted_entries
+from pck_reader import PCKReader
+from progress import ProgressTracker, format_duration
+
+VERIFY_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_LISTED_FAILURES = 10
+
+
+class VerifyReport:
+    __slots__ = ("checked", "failures", "bytes_read", "elapsed")
+
+    def __init__(self, checked, failures, bytes_read, elapsed):
+        self.checked = checked
+        self.failures = failures
+        self.bytes_read = bytes_read
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    @property
+    def throughput(self):
+        return self.bytes_read / self.elapsed if self.elapsed > 0 else 0.0
+
+    def describe(self):
+        mb = 1024 * 1024
+        return (f"{self.checked} arquivos conferidos, {len(self.failures)} com problema "
+                f"({self.bytes_read / mb:.1f} MB em {format_duration(self.elapsed)}, {self.throughput / mb:.1f} MB/s).")
+
+    def failure_details(self):
+        lines = [f"▪ {key}: {reason}" for key, reason in self.failures[:MAX_LISTED_FAILURES]]
+        if len(self.failures) > MAX_LISTED_FAILURES:
+            lines.append(f"▪ ... e mais {len(self.failures) - MAX_LISTED_FAILURES} arquivos.")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "checked": self.checked,
+            "failures": [{"path": key, "reason": reason} for key, reason in self.failures],
+            "bytes_read": self.bytes_read,
+            "elapsed": round(self.elapsed, 4),
+            "throughput": round(self.throughput),
+        }
+
+
+def _hash_view(view, chunk_size):
+    md5 = hashlib.md5()
+    for start in range(0, len(view), chunk_size):
+        md5.update(view[start:start + chunk_size])
+    return md5.digest()
+
+
+def _verify_encrypted(pck_path, index, pending, workers, chunk_size):
+    # Gera (asset, motivo, bytes lidos) para as entradas criptografadas, decifradas em paralelo.
+    try:
+        key = require_key()
+    except PCKError as e:
+        for asset, _, _ in pending:
+            yield asset, str(e), 0
+        return
+    offsets = [index.data_offset(i) for _, i, _ in pending]
+    results = hash_encrypted_entries(pck_path, offsets, key, workers, chunk_size)
+    for (asset, i, expected), (size, md5, error) in zip(pending, results):
+        if error:
+            yield asset, error, 0
+        elif size != asset.size:
+            yield asset, f"tamanho {size} (esperado {asset.size})", encrypted_size(size)
+        else:
+            yield asset, None if md5 == expected else "conteúdo corrompido", encrypted_size(size)
+
+
+def verify_pck(pck_path, assets, workers=None, chunk_size=VERIFY_CHUNK_SIZE, progress=None):
+    # Só lê as entradas da tradução, não o PCK inteiro; o hashlib libera o GIL, então as threads rendem.
+    start = time.perf_counter()
+    pending = []
+    with PCKReader(pck_path) as reader:
+        index = reader.index
+
+        def check(asset):
+            expected = asset.md5 or md5_file(asset.source, chunk_size)
+            if asset.key not in index:
+                return "ausente no PCK", 0
+            i = index.position(asset.key)
+            if index.sizes[i] != asset.size:
+                return f"tamanho {index.sizes[i]} (esperado {asset.size})", 0
+            stored_md5 = index.md5(i)
+            if stored_md5 != EMPTY_MD5 and stored_md5 != expected:
+                return "MD5 do índice não corresponde à tradução", 0
+            if index.flags[i] & PACK_FILE_ENCRYPTED:
+                pending.append((asset, i, expected))
+                return None, None
+            try:
+                data = reader.read_at(i)
+            except PCKError:
+                return "aponta para fora do PCK (arquivo truncado?)", 0
+            with data:
+                if _hash_view(data, chunk_size) != expected:
+                    return "conteúdo corrompido", len(data)
+                return None, len(data)
+
+        tracker = ProgressTracker(progress, "Verificando", sum(a.size for a in assets), len(assets))
+        failures = []
+        bytes_read = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for asset, (reason, nbytes) in zip(assets, executor.map(check, assets)):
+                if nbytes is None:
+                    continue
+                if reason:
+                    failures.append((asset.key, reason))
+                bytes_read += nbytes
+                tracker.advance(asset.size, current=asset.key)
+
+    for asset, reason, nbytes in _verify_encrypted(pck_path, index, pending, workers, chunk_size):
+        if reason:
+            failures.append((asset.key, reason))
+        bytes_read += nbytes
+        tracker.advance(asset.size, current=asset.key)
+    return VerifyReport(len(assets), failures, bytes_read, time.perf_counter() - start)